@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import warnings
+from datetime import datetime as dt
+
+os.environ.setdefault('TQDM_DISABLE', '1')
+warnings.simplefilter('ignore', FutureWarning)
+
+import numpy as np
+import pandas as pd
+
+from dw_squared.client import PlotConfig, get_data, saturn_to_frame
+from dw_squared import resample
+from dw_squared.index import ChartIndex
+from dw_squared.line import Lines
+from dw_squared.seasonal import Seasonal
+from dw_squared.table import Table
+from dw_squared.transform import compute_seasonal_stats_unfolded, generate_seasonal_frame
+
+from benchmarks.synthetic import (FakeDatawrapper, FakeTimeseries, synthetic_frame,
+                                  table_config, write_mapping)
+
+SIZES = {
+    'small': dict(freq='D', years=5, columns=10),
+    'medium': dict(freq='D', years=20, columns=100),
+    'large': dict(freq='D', years=30, columns=500),
+    'weekly': dict(freq='W', years=30, columns=200),
+    'monthly': dict(freq='M', years=30, columns=500),
+}
+
+
+def measure(func, repeat: int = 5, setup=None) -> dict:
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times), 'repeat': repeat}
+
+
+def cold():
+    resample.RESAMPLE_CACHE.clear()
+
+
+def stages(frame: pd.DataFrame, workdir: str, charts: int, repeat: int) -> dict:
+    results = dict()
+    first = frame.iloc[:, :1]
+    cutoff = frame.index[-1].year
+    series = min(frame.shape[1], 10)
+
+    mapping = write_mapping(os.path.join(workdir, 'mapping.yaml'), frame,
+                            charts=charts, series=series, revisions=2)
+    results['PlotConfig'] = measure(lambda: PlotConfig(mapping), repeat)
+    config = PlotConfig(mapping)
+    titles = list(config.titles)
+    results['series_queries'] = measure(lambda: config.series_queries(titles), repeat)
+
+    tsa = FakeTimeseries(frame)
+    bounds = config.series_bounds(titles)
+    results['get_data'] = measure(lambda: get_data(tsa, bounds), repeat)
+    data = get_data(tsa, bounds)
+    results['saturn_to_frame'] = measure(
+        lambda: [saturn_to_frame(data, config, title) for title in titles], repeat)
+
+    results['generate_seasonal_frame'] = measure(
+        lambda: generate_seasonal_frame(first, 'linear', 'W'), repeat, cold)
+    results['compute_seasonal_stats_unfolded'] = measure(
+        lambda: compute_seasonal_stats_unfolded(first, 'linear', 'W', 'mean', cutoff),
+        repeat, cold)
+
+    table = Table(data=frame, table_config=table_config(list(frame.columns)),
+                  freq_table='M', title='bench_table', token='bench')
+    results['Table.reshape_data'] = measure(
+        lambda: table.reshape_data(table.frame), repeat, cold)
+
+    lines = Lines(data=frame.iloc[:, :series], title='bench_lines', token='bench',
+                  display_today=False)
+    seasonal = Seasonal(data=first, title='bench_seasonal', token='bench',
+                        freq_graph='W', interpolation='linear', cutoff_year=cutoff)
+    for name, plot in (('Lines', lines), ('Seasonal', seasonal), ('Table', table)):
+        results[f'{name}.compute_metadata'] = measure(plot.compute_metadata, repeat)
+        results[f'{name}.payload'] = measure(
+            lambda: str(plot.payload(plot.chart_data)), repeat)
+
+    dw = FakeDatawrapper()
+    lines.dw, lines.index = dw, ChartIndex(dw)
+    results['Lines.publish'] = measure(lines.publish, repeat)
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict):
+    for size, results in current['results'].items():
+        for stage, timing in results.items():
+            previous = baseline['results'].get(size, {}).get(stage)
+            if previous is None:
+                continue
+            ratio = timing['median'] / previous['median'] if previous['median'] else np.nan
+            print(f'{size:>8} {stage:<36} {previous["median"]:10.4f}s '
+                  f'{timing["median"]:10.4f}s {ratio:6.2f}x')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='time the dw_squared pipeline stages')
+    parser.add_argument('--sizes', nargs='+', default=['small', 'medium'],
+                        choices=list(SIZES))
+    parser.add_argument('--charts', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--compare', default=None)
+    args = parser.parse_args()
+
+    report = {
+        'date': dt.utcnow().isoformat(),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'sizes': {x: SIZES[x] for x in args.sizes},
+        'charts': args.charts,
+        'repeat': args.repeat,
+        'results': dict(),
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            frame = synthetic_frame(**SIZES[size])
+            report['results'][size] = stages(frame, workdir, args.charts, args.repeat)
+            for stage, timing in report['results'][size].items():
+                print(f'{size:>8} {stage:<36} {timing["median"]:10.4f}s')
+
+    output = args.output or os.path.join(
+        'benchmarks', 'results', f'{dt.utcnow():%Y%m%d-%H%M%S}.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as stream:
+        json.dump(report, stream, indent=2)
+    print(f'results written to {output}')
+    if args.compare is not None:
+        with open(args.compare, 'r') as stream:
+            compare(report, json.load(stream))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import itertools
+import os
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import yaml
+
+
+def synthetic_frame(freq: str = 'D',
+                    years: int = 10,
+                    columns: int = 10,
+                    end: str = '2024-12-31',
+                    seed: int = 0) -> pd.DataFrame:
+    start = pd.Timestamp(end) - pd.DateOffset(years=years) + pd.Timedelta(days=1)
+    index = pd.date_range(start=start, end=end, freq=freq)
+    rng = np.random.default_rng(seed)
+    values = 100 + np.cumsum(rng.standard_normal((len(index), columns)), axis=0)
+    return pd.DataFrame(values, index=index,
+                        columns=[f'serie_{i}' for i in range(columns)])
+
+
+def table_config(columns: List[str], children: int = 4) -> Dict:
+    nodes = []
+    for start in range(0, len(columns), children + 1):
+        parent, *leaves = columns[start:start + children + 1]
+        node = {'legend': parent, 'aggregation_freq': 'mean',
+                'aggregation_level': 'sum', 'precision': '0.00'}
+        if leaves:
+            node['L2'] = [{'legend': x, 'aggregation_freq': 'mean',
+                           'precision': '0.0'} for x in leaves]
+        nodes.append(node)
+    return {'L1': nodes}
+
+
+def write_mapping(path: str, frame: pd.DataFrame, charts: int = 10,
+                  series: int = 5, revisions: int = 0) -> str:
+    names = itertools.cycle(frame.columns)
+    start = f'(date "{frame.index[0]:%Y-%m-%d}")'
+    config = []
+    for i in range(charts):
+        chart = {'chart_type': 'line', 'title': f'chart_{i}', 'source': 'bench',
+                 'notes': '', 'prefix_unit': 'unit', 'display_today': False,
+                 'series': []}
+        for j in range(series):
+            revision = None
+            if j < revisions:
+                revision = f'(deltadays (today) {-7 * (j + 1)})'
+            chart['series'].append({'series_id': next(names), 'legend': f'legend_{j}',
+                                    'start': start, 'end': None, 'revision': revision})
+        config.append(chart)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as stream:
+        yaml.safe_dump(config, stream, sort_keys=False)
+    return path
+
+
+class FakeTimeseries():
+
+    def __init__(self, frame: pd.DataFrame, idates: List[pd.Timestamp] = None) -> None:
+        self.frame = frame
+        self.idates = idates or [pd.Timestamp('2020-1-1', tz='UTC')]
+        self.calls = 0
+
+    def insertion_dates(self, name, from_insertion_date=None,
+                        to_insertion_date=None, **kwargs):
+        return list(self.idates)
+
+    def get(self, name, revision_date=None,
+            from_value_date=None, to_value_date=None, **kwargs):
+        self.calls += 1
+        return self.frame[name].loc[from_value_date:to_value_date].copy()
+
+
+class FakeDatawrapper():
+    _CHARTS_URL = 'https://api.datawrapper.de/v3/charts'
+
+    def __init__(self) -> None:
+        self.charts = dict()
+        self._ids = itertools.count()
+
+    def get(self, url, params=None):
+        return {'list': [], 'total': 0}
+
+    def chart_properties(self, chart_id):
+        return self.charts[chart_id]
+
+    def create_chart(self, title, chart_type, data=None, **kwargs):
+        chart_id = f'bench{next(self._ids)}'
+        self.charts[chart_id] = {'id': chart_id, 'title': title, 'metadata': {}}
+        self.add_data(chart_id, data)
+        return self.charts[chart_id]
+
+    def add_data(self, chart_id, data):
+        if data is not None and not isinstance(data, pd.DataFrame):
+            data = str(data)
+        self.charts[chart_id]['data'] = data
+
+    def update_description(self, chart_id, **kwargs):
+        return self.charts[chart_id]
+
+    def update_metadata(self, chart_id, metadata):
+        return self.charts[chart_id]
+
+    def publish_chart(self, chart_id, display=False):
+        return self.charts[chart_id]
+
+    def delete_chart(self, chart_id):
+        self.charts.pop(chart_id, None)
@@ -1,7 +1,12 @@
 from itertools import cycle
 import collections.abc
 
-PALETTE = cycle([7, 2, 9, 5, 6, 8, 2, 10])
+COLORS = [7, 2, 9, 5, 6, 8, 2, 10]
+PALETTE = cycle(COLORS)
+
+
+def palette(legends):
+    return dict(zip(legends, cycle(COLORS)))
 
 
 def nest_update(d, u):
@@ -11,3 +16,42 @@ def nest_update(d, u):
         else:
             d[k] = v
     return d
+
+
+def nest_patch(d, u):
+    for k, v in u.items():
+        if v is None:
+            d.pop(k, None)
+        elif isinstance(v, collections.abc.Mapping):
+            current = d.get(k)
+            d[k] = nest_patch(current if isinstance(current, collections.abc.Mapping)
+                              else {}, v)
+        else:
+            d[k] = v
+    return d
+
+
+def nest_prune(d, u):
+    pruned = dict()
+    for k, v in d.items():
+        if k not in u:
+            pruned[k] = None
+        elif (isinstance(v, collections.abc.Mapping)
+              and isinstance(u[k], collections.abc.Mapping)):
+            sub = nest_prune(v, u[k])
+            if sub:
+                pruned[k] = sub
+    return pruned
+
+
+def nest_diff(d, u):
+    diff = dict()
+    for k, v in u.items():
+        if (isinstance(v, collections.abc.Mapping)
+                and isinstance(d.get(k), collections.abc.Mapping)):
+            sub = nest_diff(d[k], v)
+            if sub:
+                diff[k] = sub
+        elif d.get(k) != v:
+            diff[k] = v
+    return diff
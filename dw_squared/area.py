@@ -1,10 +1,13 @@
 import pandas as pd
 from pandas import Timestamp
-from dw_squared import PALETTE
+from dw_squared import palette
 from dw_squared.client import DWSquared
+from dw_squared.downsample import downsample
 
 
 class Area(DWSquared):
+    dw_type = 'd3-area'
+
     def __init__(self,
                  data: pd.DataFrame = None,
                  title: str = '',
@@ -14,8 +17,11 @@ class Area(DWSquared):
                  graph_start: Timestamp = None,
                  graph_end: Timestamp = None,
                  display_today: bool = True,
+                 max_points: int = None,
+                 downsampling: str = 'lttb',
                  height: int = None,
                  width: int = None,
+                 decimals: int = None,
                  token: str = None,
                  *args,
                  **kwargs,
@@ -23,28 +29,31 @@ class Area(DWSquared):
         super().__init__(title, token, height, width, graph_start, graph_end, source, notes)
         self.frame = data
         self.title = title
+        self.decimals = decimals
         self.source = source
         self.notes = notes
         self.display_today = display_today
         self.prefix_unit = prefix_unit
+        self.max_points = max_points
+        self.downsampling = downsampling
         self._data = self.reshape_data(self.frame)
 
     @property
     def chart(self):
         if self._chart is None:
             self._chart = self.dw.create_chart(
-                self.title, chart_type='d3-area', data=self._data)
+                self.title, chart_type=self.dw_type, data=self.payload(self._data))
         return self._chart
 
     def reshape_data(self, frame: pd.DataFrame):
-        self._data = frame.reset_index()
+        self._data = downsample(frame.reset_index(), self.max_points,
+                                self.downsampling)
         return self._data
 
-    def update_data(self, frame):
-        return self._update_data(frame, self.reshape_data)
+    def update_data(self, frame, state=None):
+        return self._update_data(frame, self.reshape_data, state=state)
 
     def compute_metadata(self):
-        palette = {legend: next(PALETTE) for legend in self._data.columns[1:]}
         extra_properties = {
             'data': {
                 'column-format': {
@@ -62,7 +71,7 @@ class Area(DWSquared):
                     'auto': True,
                     'enabled': False
                 },
-                'custom-colors': palette,
+                'custom-colors': palette(self._data.columns[1:]),
 		'area-opacity': 1,
 		'area-separator-color': 0,
 		'sort-areas': 'keep',
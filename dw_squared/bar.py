@@ -1,11 +1,13 @@
 from pandas import Timestamp
 import pandas as pd
 
-from dw_squared import PALETTE
+from dw_squared import palette
 from dw_squared.client import DWSquared
 
 
 class StackedBar(DWSquared):
+    dw_type = 'stacked-column-chart'
+
     def __init__(self,
                  data: pd.DataFrame = None,
                  title: str = '',
@@ -17,6 +19,7 @@ class StackedBar(DWSquared):
                  graph_end: Timestamp=None,
                  height: int = None,
                  width: int = None,
+                 decimals: int = None,
                  token: str = None,
                  *args,
                  **kwargs,
@@ -24,6 +27,7 @@ class StackedBar(DWSquared):
         super().__init__(title, token, height, width, graph_start, graph_end, source, notes)
         self.frame = data
         self.title = title
+        self.decimals = decimals
         self.source = source
         self.notes = notes
         self.display_today = display_today
@@ -34,18 +38,17 @@ class StackedBar(DWSquared):
     def chart(self):
         if self._chart is None:
             self._chart = self.dw.create_chart(
-                self.title, chart_type='stacked-column-chart', data=self._data)
+                self.title, chart_type=self.dw_type, data=self.payload(self._data))
         return self._chart
 
     def reshape_data(self, frame: pd.DataFrame):
         self._data = frame.reset_index()
         return self._data
 
-    def update_data(self, frame):
-        return self._update_data(frame, self.reshape_data)
+    def update_data(self, frame, state=None):
+        return self._update_data(frame, self.reshape_data, state=state)
 
     def compute_metadata(self):
-        palette = {legend: next(PALETTE) for legend in self._data.columns[1:]}
         extra_properties = {
             'data': {
                 'transpose': True,
@@ -59,7 +62,7 @@ class StackedBar(DWSquared):
             'visualize': {
                 'x-grid': 'ticks',
                 'y-grid': 'on',
-                'custom-colors': palette,
+                'custom-colors': palette(self._data.columns[1:]),
                 'labeling': 'top' if self._data.shape[1] > 2 else 'off',
       		    'category': 'direct',
                 'valueLabels': {
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+from typing import Optional
+
+import pandas as pd
+
+from tshistory.api import timeseries
+
+
+def _stamp(x: Optional[pd.Timestamp]) -> Optional[str]:
+    return None if x is None else pd.Timestamp(x).isoformat()
+
+
+def _unstamp(x: Optional[str]) -> Optional[pd.Timestamp]:
+    return None if x is None else pd.Timestamp(x)
+
+
+class SeriesCache():
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, name: str, revision: Optional[pd.Timestamp], ext: str) -> str:
+        key = f'{name}|{_stamp(revision)}'.encode()
+        return os.path.join(self.path, f'{hashlib.sha1(key).hexdigest()}.{ext}')
+
+    def _read(self, name, revision):
+        meta_file = self._file(name, revision, 'json')
+        if not os.path.exists(meta_file):
+            return None, None
+        with open(meta_file, 'r') as stream:
+            meta = json.load(stream)
+        serie = pd.read_parquet(self._file(name, revision, 'parquet'))['value']
+        serie.name = name
+        return meta, serie
+
+    def _write(self, name, revision, serie, meta):
+        data_file = self._file(name, revision, 'parquet')
+        serie.to_frame('value').to_parquet(data_file + '.tmp')
+        os.replace(data_file + '.tmp', data_file)
+        meta_file = self._file(name, revision, 'json')
+        with open(meta_file + '.tmp', 'w') as stream:
+            json.dump(meta, stream)
+        os.replace(meta_file + '.tmp', meta_file)
+
+    def last_insertion(self, tsa: timeseries, name, revision, since=None):
+        idates = tsa.insertion_dates(name,
+                                     from_insertion_date=_unstamp(since),
+                                     to_insertion_date=revision)
+        return _stamp(idates[-1]) if idates else since
+
+    def get(self, tsa: timeseries,
+            name: str,
+            revision_date: Optional[pd.Timestamp] = None,
+            from_value_date: Optional[pd.Timestamp] = None,
+            to_value_date: Optional[pd.Timestamp] = None) -> Optional[pd.Series]:
+        meta, cached = self._read(name, revision_date)
+        if meta is not None:
+            last = self.last_insertion(tsa, name, revision_date, meta['last_insertion'])
+            if last != meta['last_insertion']:
+                meta, cached = None, None
+        if meta is None:
+            last = self.last_insertion(tsa, name, revision_date)
+            serie = tsa.get(name, revision_date=revision_date,
+                            from_value_date=from_value_date,
+                            to_value_date=to_value_date)
+            if serie is None:
+                return None
+            meta = {'start': _stamp(from_value_date),
+                    'end': _stamp(to_value_date),
+                    'last_insertion': last}
+            self._write(name, revision_date, serie, meta)
+            return serie
+
+        start, end = _unstamp(meta['start']), _unstamp(meta['end'])
+        parts = []
+        if start is not None and (from_value_date is None or from_value_date < start):
+            parts.append(tsa.get(name, revision_date=revision_date,
+                                 from_value_date=from_value_date,
+                                 to_value_date=start))
+            meta['start'] = _stamp(from_value_date)
+        parts.append(cached)
+        if end is not None and (to_value_date is None or to_value_date > end):
+            parts.append(tsa.get(name, revision_date=revision_date,
+                                 from_value_date=end,
+                                 to_value_date=to_value_date))
+            meta['end'] = _stamp(to_value_date)
+        if len(parts) > 1:
+            merged = pd.concat([x for x in parts if x is not None])
+            cached = merged[~merged.index.duplicated(keep='last')].sort_index()
+            self._write(name, revision_date, cached, meta)
+        return cached[from_value_date:to_value_date]
@@ -1,21 +1,39 @@
 from typing import Dict, List, Optional, Tuple
+from copy import deepcopy
+from types import MappingProxyType
+from collections import Counter
+from concurrent.futures import (Future, ProcessPoolExecutor, ThreadPoolExecutor,
+                                as_completed, wait)
+from functools import partial
+import asyncio
+import multiprocessing
+import queue
+import threading
+import time
 from itertools import chain, repeat
 from numpy.lib.twodim_base import tri
 import yaml
 
 import pandas as pd
 import numpy as np
+import requests as r
 
 from tshistory.api import timeseries
+from tqdm import tqdm
 from tqdm.contrib.concurrent import thread_map
 
-from dw_squared.plot import _DWSquared, DWSquared
+from dw_squared.plot import _DWSquared, DWSquared, PreparedChart
 from dw_squared.area import Area
 from dw_squared.bar import StackedBar
 from dw_squared.line import Lines
 from dw_squared.seasonal import Seasonal
-from dw_squared.moments import evaluate_not_none
-from dw_squared.table import Table, triple_loop_list
+from dw_squared.moments import Moments
+from dw_squared.cache import SeriesCache
+from dw_squared.index import shared_index
+from dw_squared.shared import SharedFrame, attach_frame
+from dw_squared.state import FingerprintStore
+from dw_squared.table import Table, rolled_up, row_spec, spec_values
+from dw_squared.transport import TimeoutAdapter
 
 
 PLOT_TYPE = {
@@ -38,35 +56,44 @@ def safe_dt_none(x, return_type=None):
         return return_type
 
 
-class PlotConfig():
+class _Config():
 
     def __init__(self, path) -> None:
+        self.moments = Moments()
         self.path = path
         with open(self.path, 'r') as stream:
             self.config = yaml.load(stream, Loader=yaml.FullLoader)
         self.df_config = pd.json_normalize(self.config)
-
-    def single_config(self, title):
-        config = list(filter(lambda x: x['title'] == title, self.config))[0]
+        self.titles = tuple(x['title'] for x in self.config)
+        self._configs = MappingProxyType(
+            {x['title']: MappingProxyType(self._resolve(x)) for x in self.config})
+        self._orders = MappingProxyType(
+            {x['title']: tuple(self._order(x)) for x in self.config})
+        self._queries = self._series_queries()
+
+    def _resolve(self, config):
+        config = deepcopy(config)
         if 'graph_end' in config.keys():
-            config['graph_end'] = evaluate_not_none(config['graph_end'])
+            config['graph_end'] = self.moments.evaluate(config['graph_end'])
         if 'graph_start' in config.keys():
-            config['graph_start'] = evaluate_not_none(config['graph_start'])
-        del config['series']
+            config['graph_start'] = self.moments.evaluate(config['graph_start'])
         return config
 
+    def _order(self, config):
+        raise NotImplementedError()
+
+    def _series_queries(self):
+        raise NotImplementedError()
+
+    def single_config(self, title):
+        return dict(self._configs[title])
+
     def order_series(self, title: str):
-        conf = list(filter(lambda x: title == x['title'], self.config))[0]
-        return [s['legend'] for s in conf['series']]
+        return list(self._orders[title])
 
     def series_queries(self, titles: List[str] = list()):
-        mask = self.df_config.title.isin(titles)
-        t, s = self.df_config[mask]['title'], self.df_config[mask]['series']
-        dfs = {title: pd.DataFrame.from_records(x)
-               for title, x in zip(t, s)}
-        df = pd.concat(dfs, ignore_index=False)
-        dates = df[['start', 'end', 'revision']].applymap(evaluate_not_none)
-        return pd.concat((df[['series_id', 'legend']], dates), axis=1).replace({np.nan: None})
+        mask = self._queries.index.get_level_values(0).isin(titles)
+        return self._queries[mask]
 
     def series_bounds(self, titles: List[str] = list()):
         return (self.series_queries(titles)
@@ -76,119 +103,604 @@ class PlotConfig():
                 )
 
 
-class TableConfig():
-
-    def __init__(self, path) -> None:
-        self.path = path
-        with open(self.path, 'r') as stream:
-            self.config = yaml.load(stream, Loader=yaml.FullLoader)
-        self.df_config = pd.json_normalize(self.config)
+class PlotConfig(_Config):
 
-    def single_config(self, title):
-        config = list(filter(lambda x: x['title'] == title, self.config))[0]
-        if 'graph_end' in config.keys():
-            config['graph_end'] = evaluate_not_none(config['graph_end'])
-        if 'graph_start' in config.keys():
-            config['graph_start'] = evaluate_not_none(config['graph_start'])
+    def _resolve(self, config):
+        config = super()._resolve(config)
+        config.pop('series', None)
         return config
 
-    def order_series(self, title: str):
-        conf = list(filter(lambda x: title == x['title'], self.config))[0]
-        return triple_loop_list(conf, 'legend')
+    def _order(self, config):
+        return [s['legend'] for s in config.get('series', [])]
 
-    def series_queries(self, titles: List[str] = list()):
-        mask = self.df_config.title.isin(titles)
-        t = self.df_config[mask]['title']
-        start = self.df_config[mask]['graph_start'].apply(evaluate_not_none)
-        end = self.df_config[mask]['graph_end'].apply(evaluate_not_none)
+    def _series_queries(self):
+        dfs = {x['title']: pd.DataFrame.from_records(x['series'])
+               for x in self.config if x.get('series')}
+        if not dfs:
+            return pd.DataFrame(columns=['series_id', 'legend', 'start', 'end', 'revision'],
+                                index=pd.MultiIndex.from_tuples([], names=[None, None]))
+        df = pd.concat(dfs, ignore_index=False)
+        dates = df[['start', 'end', 'revision']].applymap(self.moments.evaluate)
+        return pd.concat((df[['series_id', 'legend']], dates), axis=1).replace({np.nan: None})
+
+
+class TableConfig(_Config):
+
+    def _order(self, config):
+        return spec_values(row_spec(config), 'legend')
+
+    def _series_queries(self):
         frames = []
         for x in self.config:
-            if x['title'] in t.values:
-                series_id = triple_loop_list(x, 'series_id')
-                legend = triple_loop_list(x, 'legend')
-                _dataframe = pd.DataFrame(np.array([series_id, legend]).T,
-                                          columns=['series_id', 'legend'])
-                _dataframe['start'] = start[mask].values[0]
-                _dataframe['end'] = end[mask].values[0]
-                _dataframe['revision'] = np.nan
-                _dataframe['title'] = x['title']
-                frames.append(
-                    _dataframe.reset_index().set_index(['title', 'index']))
+            resolved = self._configs[x['title']]
+            spec = row_spec(x)
+            series_id = spec_values(spec, 'series_id')
+            legend = spec_values(spec, 'legend')
+            _dataframe = pd.DataFrame(np.array([series_id, legend]).T,
+                                      columns=['series_id', 'legend'])
+            _dataframe = _dataframe[~rolled_up(spec)].copy()
+            _dataframe['start'] = resolved.get('graph_start')
+            _dataframe['end'] = resolved.get('graph_end')
+            _dataframe['revision'] = np.nan
+            _dataframe['title'] = x['title']
+            frames.append(
+                _dataframe.reset_index().set_index(['title', 'index']))
         return pd.concat(frames, axis=0)
 
-    def series_bounds(self, titles: List[str] = list()):
-        return (self.series_queries(titles)
-                .groupby(['series_id', 'revision'], dropna=False)
-                .agg({'start': 'min', 'end': 'max'}).replace({np.nan: None})
-                .to_dict('index')
-                )
-
-
-def get_data(tsa: timeseries, queries: Dict = None):
-    def body(item):
-        key, val = item
-        kwargs = dict(name=key[0],
-                      from_value_date=safe_dt_none(val['start']),
-                      to_value_date=safe_dt_none(val['end']),
-                      revision_date=safe_dt_none(key[-1]))
-        return key, tsa.get(**kwargs)
 
-    return dict(thread_map(body, queries.items()))
+def fetch_serie(tsa: timeseries, key, bounds: Dict, cache: SeriesCache = None):
+    kwargs = dict(name=key[0],
+                  from_value_date=safe_dt_none(bounds['start']),
+                  to_value_date=safe_dt_none(bounds['end']),
+                  revision_date=safe_dt_none(key[-1]))
+    if cache is not None:
+        return cache.get(tsa, **kwargs)
+    return tsa.get(**kwargs)
+
+
+def revision_key(revision):
+    return None if revision is None or pd.isna(revision) else revision
+
+
+class FetchResult(dict):
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.errors = dict()
+
+
+def plan_fetch(queries: Dict) -> Dict[Tuple, List]:
+    groups = dict()
+    for key, bounds in queries.items():
+        group = (revision_key(key[-1]),
+                 safe_dt_none(bounds['start']),
+                 safe_dt_none(bounds['end']))
+        groups.setdefault(group, []).append(key)
+    return groups
+
+
+def align_stamp(stamp, tz) -> pd.Timestamp:
+    stamp = pd.Timestamp(stamp)
+    if stamp.tz is None:
+        return stamp if tz is None else stamp.tz_localize('UTC').tz_convert(tz)
+    return stamp.tz_convert(tz) if tz is not None else stamp.tz_convert('UTC').tz_localize(None)
+
+
+def resolve_revisions(tsa: timeseries, queries: Dict, executor=None) -> Dict:
+    # only a name read by several keys can collapse
+    reads = Counter(key[0] for key in queries)
+    names = list(dict.fromkeys(
+        key[0] for key in queries
+        if reads[key[0]] > 1 and revision_key(key[-1]) is not None))
+
+    def listing(name):
+        try:
+            return name, pd.DatetimeIndex(tsa.insertion_dates(name))
+        except Exception:
+            return name, None
+
+    idates = dict((executor.map if executor is not None else map)(listing, names))
+    versions = dict()
+    for key in queries:
+        name, revision = key[0], revision_key(key[-1])
+        stamps = idates.get(name)
+        if stamps is None or not len(stamps):
+            versions[key] = key
+            continue
+        if revision is None:
+            position = len(stamps)
+        else:
+            position = stamps.searchsorted(align_stamp(revision, stamps.tz), side='right')
+        versions[key] = (name, stamps[position - 1]) if position else key
+    # a version read by a single key is fetched as requested
+    counts = Counter(versions.values())
+    return {key: version if counts[version] > 1 else key
+            for key, version in versions.items()}
+
+
+def widest_bounds(bounds: List[Dict]) -> Dict:
+    starts = [safe_dt_none(x['start']) for x in bounds]
+    ends = [safe_dt_none(x['end']) for x in bounds]
+    return {'start': None if None in starts else min(starts),
+            'end': None if None in ends else max(ends)}
+
+
+def pool_connections(tsa: timeseries, size: int, timeout: float = None):
+    session = getattr(tsa, 'session', None)
+    if not isinstance(session, r.Session):
+        return
+    current = session.get_adapter('http://')
+    if isinstance(current, TimeoutAdapter) and current._pool_maxsize == size:
+        current.timeout = timeout
+        return
+    adapter = TimeoutAdapter(timeout, pool_connections=size, pool_maxsize=size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+
+def with_retries(fetch, retries: int = 2, backoff: float = 0.5):
+    for attempt in range(retries + 1):
+        try:
+            return fetch()
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+def get_data(tsa: timeseries,
+             queries: Dict = None,
+             cache: SeriesCache = None,
+             workers: int = 8,
+             timeout: float = None,
+             retries: int = 2,
+             backoff: float = 0.5,
+             batch=None,
+             resolve: bool = True) -> FetchResult:
+    result = FetchResult()
+    pool_connections(tsa, workers, timeout)
+
+    def single(key):
+        try:
+            result[key] = with_retries(
+                partial(fetch_serie, tsa, key, plan[key], cache), retries, backoff)
+        except Exception as error:
+            result[key], result.errors[key] = None, error
+
+    def grouped(group, keys):
+        revision, start, end = group
+        names = list(dict.fromkeys(key[0] for key in keys))
+        try:
+            series = with_retries(
+                partial(batch, tsa, names, revision_date=revision,
+                        from_value_date=start, to_value_date=end),
+                retries, backoff)
+        except Exception:
+            for key in keys:
+                single(key)
+            return
+        for key in keys:
+            result[key] = series.get(key[0])
+            if result[key] is None:
+                result.errors[key] = KeyError(key[0])
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        versions = (resolve_revisions(tsa, queries, executor) if resolve
+                    else {key: key for key in queries})
+        merged = dict()
+        for key, version in versions.items():
+            merged.setdefault(version, []).append(queries[key])
+        plan = {version: widest_bounds(x) for version, x in merged.items()}
+        if batch is None or cache is not None:
+            jobs = [executor.submit(single, key) for key in plan]
+        else:
+            jobs = [executor.submit(grouped, group, keys)
+                    for group, keys in plan_fetch(plan).items()]
+        for _ in tqdm(as_completed(jobs), total=len(jobs)):
+            pass
+    ordered = FetchResult()
+    for key, version in versions.items():
+        serie = result[version]
+        if version != key and serie is not None:
+            serie = slice_serie(serie, safe_dt_none(queries[key]['start']),
+                                safe_dt_none(queries[key]['end']))
+        ordered[key] = serie
+    ordered.errors = {key: result.errors[versions[key]] for key in queries
+                      if versions[key] in result.errors}
+    return ordered
+
+
+def series_lookup(config: PlotConfig, title: str) -> Dict:
+    queries = config.series_queries([title]).xs(title, level=0)
+    lookup = dict()
+    for name, revision, legend, start, end in zip(
+            queries['series_id'], queries['revision'], queries['legend'],
+            queries['start'], queries['end']):
+        lookup.setdefault((name, revision_key(revision)), []).append(
+            (legend, safe_dt_none(start), safe_dt_none(end)))
+    return lookup
+
+
+def slice_serie(serie: pd.Series, start, end) -> pd.Series:
+    if serie.index.is_monotonic_increasing:
+        return serie.iloc[serie.index.slice_indexer(start, end)]
+    return serie.sort_index()[start:end]
+
+
+def assemble_frame(columns: Dict[str, pd.Series]) -> pd.DataFrame:
+    indexes = [x.index for x in columns.values()]
+    numeric = all(x.dtype.kind == 'f' for x in columns.values())
+    datetime = all(isinstance(x, pd.DatetimeIndex) for x in indexes)
+    if not (numeric and datetime) or len({x.tz for x in indexes}) != 1:
+        return pd.concat(columns, axis=1)
+    stamps = [x.as_unit('ns').asi8 for x in indexes]
+    union = np.unique(np.concatenate(stamps))
+    values = np.full((len(union), len(columns)), np.nan)
+    for i, (serie, stamp) in enumerate(zip(columns.values(), stamps)):
+        values[np.searchsorted(union, stamp), i] = serie.to_numpy()
+    index = pd.DatetimeIndex(union.view('datetime64[ns]'))
+    if indexes[0].tz is not None:
+        index = index.tz_localize('UTC').tz_convert(indexes[0].tz)
+    names = {x.name for x in indexes}
+    index.name = names.pop() if len(names) == 1 else None
+    return pd.DataFrame(values, index=index, columns=list(columns))
 
 
 def saturn_to_frame(data: TSAResult,
                     config: PlotConfig,
                     title: str):
-    series = (config
-              .series_queries([title])
-              .xs(title, level=0)
-              .set_index(['series_id', 'revision']))
-
-    def key(name, rev):
-        return series.xs([name, rev])['legend']
-
-    def slice_range(name, rev, serie):
-        bounds = series.xs([name, rev])
-        start, end = bounds['start'], bounds['end']
-        return serie[start: end]
-
-    filtered = {key(n, r): slice_range(n, r, v) for (n, r), v in data.items()}
-    return pd.concat(filtered, axis=1)
+    lookup = series_lookup(config, title)
+    columns = dict()
+    for (name, revision), serie in data.items():
+        targets = lookup.get((name, revision_key(revision)), [])
+        if serie is None:
+            continue
+        for legend, start, end in targets:
+            columns[legend] = slice_serie(serie, start, end)
+    return assemble_frame(columns)
+
+
+def chart_kwargs(data: pd.DataFrame,
+                 config: PlotConfig,
+                 title: str,
+                 token: str) -> Dict:
+    cols = config.order_series(title)
+    _config = config.single_config(title)
+    if isinstance(config, TableConfig):
+        return {**_config,
+                'data': data.reindex(columns=cols),
+                'table_config': _config,
+                'token': token}
+    return {**_config,
+            'data': data[cols],
+            'token': token}
+
+
+def build_chart(data: pd.DataFrame,
+                config: PlotConfig,
+                title: str,
+                token: str) -> _DWSquared:
+    kwargs = chart_kwargs(data, config, title, token)
+    return PLOT_TYPE[kwargs['chart_type']](**kwargs)
+
+
+def reshape_payload(spec: Dict, kwargs: Dict) -> Dict:
+    plot = PLOT_TYPE[kwargs['chart_type']](**kwargs, data=attach_frame(spec))
+    data = plot.chart_data
+    return {'title': plot.title,
+            'token': kwargs['token'],
+            'dw_type': plot.dw_type,
+            'payload': str(plot.payload(data)),
+            'metadata': plot.compute_metadata(),
+            'key': plot.content_hash(data),
+            'source': plot.source,
+            'notes': plot.notes,
+            'reset': plot.reset}
+
+
+def submit_chart(executor: ProcessPoolExecutor,
+                 data: pd.DataFrame,
+                 config: PlotConfig,
+                 title: str,
+                 token: str) -> Future:
+    kwargs = chart_kwargs(data, config, title, token)
+    shared = SharedFrame(kwargs.pop('data'))
+    try:
+        future = executor.submit(reshape_payload, shared.spec, kwargs)
+    except Exception:
+        shared.close()
+        raise
+    future.add_done_callback(lambda _: shared.close())
+    return future
 
 
 def create_single_plot(data: pd.DataFrame,
                        config: PlotConfig,
                        title: dict,
-                       token: str):
-    cols = config.order_series(title)
-    kwargs = {**config.single_config(title),
-              'data': data[cols],
-              'token': token}
-    plot = PLOT_TYPE[kwargs['chart_type']](**kwargs)
-    return plot.publish()
+                       token: str,
+                       upsert: bool = False,
+                       state: FingerprintStore = None):
+    plot = build_chart(data, config, title, token)
+    return plot.publish(upsert=upsert, state=state)
 
 
 def create_single_table(data: pd.DataFrame,
                         config: TableConfig,
                         title: dict,
-                        token: str):
-    cols = config.order_series(title)
-    _config = config.single_config(title)
-    kwargs = {**_config,
-              'data': data[cols],
-              'table_config': _config,
-              'token': token}
-    plot = PLOT_TYPE[kwargs['chart_type']](**kwargs)
-    return plot.publish()
+                        token: str,
+                        upsert: bool = False,
+                        state: FingerprintStore = None):
+    plot = build_chart(data, config, title, token)
+    return plot.publish(upsert=upsert, state=state)
 
 
 def update_single_plot(data: pd.DataFrame,
                        config: PlotConfig,
                        title: dict,
-                       token: str):
+                       token: str,
+                       state: FingerprintStore = None):
     cols = config.order_series(title)
     kwargs = {**config.single_config(title),
               'data': data[cols],
               'token': token}
     plot = PLOT_TYPE[kwargs['chart_type']](**kwargs)
-    return plot.update_data(data)
+    return plot.update_data(data, state=state)
+
+
+def last_insertion(tsa: timeseries, queries: pd.DataFrame):
+    idates = [tsa.insertion_dates(name)
+              for name in queries['series_id'].unique()]
+    return max((x[-1] for x in idates if x), default=None)
+
+
+def inserted_since(tsa: timeseries, query, since: pd.Timestamp):
+    if query['revision'] is not None:
+        return None, None
+    history = tsa.history(query['series_id'],
+                          from_insertion_date=since,
+                          from_value_date=safe_dt_none(query['start']),
+                          to_value_date=safe_dt_none(query['end']),
+                          diffmode=True)
+    if not history:
+        return None, None
+    diffs = pd.concat(history.values())
+    return diffs[~diffs.index.duplicated(keep='last')].sort_index(), max(history)
+
+
+def refresh_single_plot(tsa: timeseries,
+                        config: PlotConfig,
+                        title: str,
+                        token: str,
+                        plots: Dict[str, DWSquared],
+                        state: FingerprintStore = None):
+    queries = config.series_queries([title]).xs(title, level=0)
+    plot = plots.get(title)
+    if plot is None:
+        refreshed_at = last_insertion(tsa, queries)
+        data = get_data(tsa, config.series_bounds([title]))
+        data = saturn_to_frame(data, config, title)
+        kwargs = {**config.single_config(title),
+                  'data': data[config.order_series(title)],
+                  'token': token}
+        plot = PLOT_TYPE[kwargs['chart_type']](**kwargs)
+        plot.refreshed_at = refreshed_at
+        plots[title] = plot
+        return plot.publish(upsert=True, state=state)
+
+    since = None
+    if plot.refreshed_at is not None:
+        since = plot.refreshed_at + pd.Timedelta(microseconds=1)
+    tails = dict()
+    for _, query in queries.iterrows():
+        tail, idate = inserted_since(tsa, query, since)
+        if tail is not None:
+            tails[query['legend']] = tail
+            plot.refreshed_at = max(x for x in (plot.refreshed_at, idate)
+                                    if x is not None)
+    if not tails:
+        return None
+    return plot.update_tail(pd.concat(tails, axis=1), state=state)
+
+
+def publish_all(config: PlotConfig,
+                tsa: timeseries,
+                token: str,
+                titles: List[str] = None,
+                max_workers: int = 8,
+                index_path: str = None,
+                upsert: bool = False,
+                state_path: str = None,
+                cache_path: str = None,
+                timeout: float = None,
+                retries: int = 2,
+                backoff: float = 0.5,
+                return_exceptions: bool = False):
+    titles = titles or [x['title'] for x in config.config]
+    shared_index(token, index_path)
+    state = (FingerprintStore(state_path, autosave=False)
+             if state_path is not None else None)
+    cache = SeriesCache(cache_path) if cache_path is not None else None
+    data = get_data(tsa, config.series_bounds(titles), cache, workers=max_workers,
+                    timeout=timeout, retries=retries, backoff=backoff)
+    errors = {(name, revision_key(revision)): error
+              for (name, revision), error in data.errors.items()}
+    create = (create_single_table if isinstance(config, TableConfig)
+              else create_single_plot)
+
+    def body(title):
+        try:
+            queries = config.series_queries([title])
+            for key in zip(queries['series_id'], queries['revision']):
+                error = errors.get((key[0], revision_key(key[1])))
+                if error is not None:
+                    raise error
+            frame = saturn_to_frame(data, config, title)
+            return title, create(frame, config, title, token,
+                                 upsert=upsert, state=state)
+        except Exception as error:
+            return title, error
+
+    results = dict(thread_map(body, titles, max_workers=max_workers))
+    if state is not None:
+        state.save()
+    if not return_exceptions:
+        for result in results.values():
+            if isinstance(result, Exception):
+                raise result
+    return results
+
+
+def publish_pipeline(config: PlotConfig,
+                     tsa: timeseries,
+                     token: str,
+                     titles: List[str] = None,
+                     fetch_workers: int = 8,
+                     reshape_workers: int = 2,
+                     publish_workers: int = 4,
+                     queue_size: int = 8,
+                     index_path: str = None,
+                     upsert: bool = False,
+                     state_path: str = None,
+                     cache_path: str = None,
+                     processes: int = None,
+                     timeout: float = None,
+                     retries: int = 2,
+                     backoff: float = 0.5,
+                     return_exceptions: bool = False):
+    titles = titles or list(config.titles)
+    shared_index(token, index_path)
+    state = (FingerprintStore(state_path, autosave=False)
+             if state_path is not None else None)
+    cache = SeriesCache(cache_path) if cache_path is not None else None
+    bounds = config.series_bounds(titles)
+    keys = {(name, revision_key(revision)): (name, revision)
+            for name, revision in bounds}
+    needs = dict()
+    for title in titles:
+        queries = config.series_queries([title])
+        needs[title] = {(name, revision_key(revision)) for name, revision
+                        in zip(queries['series_id'], queries['revision'])}
+    pending = {title: set(x) for title, x in needs.items()}
+    users = Counter(key for x in needs.values() for key in x)
+    data, errors, results = dict(), dict(), dict()
+    lock = threading.Lock()
+
+    pool_connections(tsa, fetch_workers, timeout)
+    with ThreadPoolExecutor(max_workers=fetch_workers) as executor:
+        versions = resolve_revisions(tsa, bounds, executor)
+    members = dict()
+    for raw in bounds:
+        members.setdefault(versions[raw], []).append(
+            (raw[0], revision_key(raw[-1])))
+    plan = {version: widest_bounds([bounds[keys[x]] for x in group])
+            for version, group in members.items()}
+
+    to_fetch = queue.Queue()
+    for version in dict.fromkeys(versions[keys[key]] for title in titles for key in sorted(
+            needs[title], key=lambda x: (x[0], str(x[1])))):
+        to_fetch.put(version)
+    to_reshape = queue.Queue(maxsize=queue_size)
+    # reshapes submitted to the process pool wait in this queue
+    to_publish = queue.Queue(maxsize=queue_size + (processes or 0))
+
+    def fetch_stage():
+        while True:
+            try:
+                version = to_fetch.get_nowait()
+            except queue.Empty:
+                return
+            error = None
+            try:
+                serie = with_retries(partial(fetch_serie, tsa, version, plan[version], cache),
+                                     retries, backoff)
+            except Exception as exc:
+                serie, error = None, exc
+            ready = []
+            with lock:
+                for key in members[version]:
+                    data[key] = serie
+                    for title in titles:
+                        if key in pending[title]:
+                            pending[title].discard(key)
+                            if error is not None:
+                                errors.setdefault(title, error)
+                            if not pending[title]:
+                                ready.append(title)
+            for title in ready:
+                to_reshape.put(title)
+
+    def reshape_stage():
+        while (title := to_reshape.get()) is not None:
+            with lock:
+                frames = {keys[key]: data[key] for key in needs[title]}
+            try:
+                if title in errors:
+                    raise errors[title]
+                frame = saturn_to_frame(frames, config, title)
+                if pool is None:
+                    plot = build_chart(frame, config, title, token)
+                else:
+                    plot = submit_chart(pool, frame, config, title, token)
+                to_publish.put((title, plot))
+            except Exception as error:
+                results[title] = error
+            finally:
+                with lock:
+                    for key in needs[title]:
+                        users[key] -= 1
+                        if not users[key]:
+                            data.pop(key, None)
+
+    def publish_stage():
+        while (item := to_publish.get()) is not None:
+            title, plot = item
+            try:
+                if isinstance(plot, Future):
+                    plot = PreparedChart(**plot.result())
+                results[title] = plot.publish(upsert=upsert, state=state)
+            except Exception as error:
+                results[title] = error
+
+    pool = None
+    if processes:
+        # spawned workers: forking would copy the locks held by the stage threads
+        pool = ProcessPoolExecutor(max_workers=processes,
+                                   mp_context=multiprocessing.get_context('spawn'))
+    with ThreadPoolExecutor(max_workers=publish_workers) as publishers, \
+            ThreadPoolExecutor(max_workers=reshape_workers) as reshapers:
+        publish_jobs = [publishers.submit(publish_stage) for _ in range(publish_workers)]
+        reshape_jobs = [reshapers.submit(reshape_stage) for _ in range(reshape_workers)]
+        for title in titles:
+            if not pending[title]:
+                to_reshape.put(title)
+        with ThreadPoolExecutor(max_workers=fetch_workers) as fetchers:
+            for _ in range(fetch_workers):
+                fetchers.submit(fetch_stage)
+        for _ in reshape_jobs:
+            to_reshape.put(None)
+        wait(reshape_jobs)
+        for _ in publish_jobs:
+            to_publish.put(None)
+    if pool is not None:
+        pool.shutdown()
+    if state is not None:
+        state.save()
+
+    results = {title: results.get(title) for title in titles}
+    if not return_exceptions:
+        for result in results.values():
+            if isinstance(result, Exception):
+                raise result
+    return results
+
+
+async def apublish_many(plots: List[DWSquared],
+                        concurrency: int = 8,
+                        upsert: bool = False,
+                        state: FingerprintStore = None,
+                        return_exceptions: bool = False):
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return await asyncio.gather(
+            *(plot.apublish(upsert=upsert, state=state, executor=executor)
+              for plot in plots),
+            return_exceptions=return_exceptions)
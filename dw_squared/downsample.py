@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    y = np.nan_to_num(y, nan=np.nanmean(y) if np.isfinite(y).any() else 0.)
+    edges = np.linspace(1, n - 1, n_out - 1).astype('int64')
+    selected = np.empty(n_out, dtype='int64')
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    n = len(x)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    y = np.nan_to_num(y, nan=np.nanmean(y) if np.isfinite(y).any() else 0.)
+    edges = np.linspace(0, n, n_out // 2 + 1).astype('int64')
+    low = np.minimum.reduceat(y, edges[:-1])
+    high = np.maximum.reduceat(y, edges[:-1])
+    bucket = np.repeat(np.arange(len(edges) - 1), np.diff(edges))
+    first_low = np.flatnonzero(y == low[bucket])
+    first_high = np.flatnonzero(y == high[bucket])
+    _, at_low = np.unique(bucket[first_low], return_index=True)
+    _, at_high = np.unique(bucket[first_high], return_index=True)
+    return np.union1d(first_low[at_low], first_high[at_high])
+
+
+METHODS = {
+    'lttb': lttb,
+    'minmax': minmax,
+}
+
+
+def downsample(data: pd.DataFrame, max_points: int = None,
+               method: str = 'lttb', keep=()) -> pd.DataFrame:
+    if max_points is None or len(data) <= max_points:
+        return data
+    axis = data.iloc[:, 0]
+    if pd.api.types.is_datetime64_any_dtype(axis):
+        x = axis.to_numpy(dtype='datetime64[ns]').astype('int64').astype(float)
+    else:
+        x = np.arange(len(data), dtype=float)
+    budget = max(max_points // max(data.shape[1] - 1, 1), 3)
+    positions = [np.array([0, len(data) - 1])]
+    for column in data.columns[1:]:
+        y = data[column].to_numpy(dtype=float)
+        positions.append(METHODS[method](x, y, budget))
+    positions.append(np.flatnonzero(axis.isin(list(keep)).to_numpy()))
+    return data.iloc[np.unique(np.concatenate(positions))].reset_index(drop=True)
@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+import datawrapper
+
+from dw_squared.transport import shared_client
+
+PAGE_SIZE = 100
+
+_SHARED: Dict[str, 'ChartIndex'] = dict()
+_SHARED_LOCK = threading.Lock()
+
+
+def list_charts(dw: datawrapper.Datawrapper, page_size: int = PAGE_SIZE):
+    offset = 0
+    while True:
+        page = dw.get(dw._CHARTS_URL, params={'limit': page_size,
+                                               'offset': offset})
+        charts = page['list'] if isinstance(page, dict) else page
+        yield from charts
+        offset += len(charts)
+        total = page.get('total', 0) if isinstance(page, dict) else 0
+        if not charts or offset >= total:
+            break
+
+
+class ChartIndex():
+
+    def __init__(self, dw: datawrapper.Datawrapper, path: str = None) -> None:
+        self.dw = dw
+        self.path = path
+        self._lock = threading.RLock()
+        self._index = self.load()
+
+    def load(self) -> Optional[Dict[str, str]]:
+        if self.path is None or not os.path.exists(self.path):
+            return None
+        with open(self.path, 'r') as stream:
+            return json.load(stream)
+
+    @property
+    def index(self) -> Dict[str, str]:
+        with self._lock:
+            if self._index is None:
+                self.refresh()
+            return self._index
+
+    def refresh(self) -> Dict[str, str]:
+        index = dict()
+        # charts are listed newest first, keep the latest chart of a title
+        for chart in list_charts(self.dw):
+            index.setdefault(chart['title'], chart['id'])
+        with self._lock:
+            self._index = index
+            self.save()
+        return self._index
+
+    def save(self):
+        if self.path is None or self._index is None:
+            return
+        with self._lock, open(self.path, 'w') as stream:
+            json.dump(self._index, stream)
+
+    def bind(self, path: str):
+        with self._lock:
+            self.path = path
+            stored = self.load()
+            if stored is not None and self._index is not None:
+                # both views belong to the same account, the live one is newer
+                stored.update(self._index)
+            if stored is not None:
+                self._index = stored
+            self.save()
+
+    def get(self, title: str) -> Optional[str]:
+        return self.index.get(title)
+
+    def add(self, title: str, chart_id: str):
+        with self._lock:
+            self.index[title] = chart_id
+            self.save()
+
+    def discard(self, title: str):
+        with self._lock:
+            self.index.pop(title, None)
+            self.save()
+
+    def __getitem__(self, title: str) -> str:
+        return self.index[title]
+
+    def __contains__(self, title: str) -> bool:
+        return title in self.index
+
+
+def shared_index(token: str, path: str = None) -> ChartIndex:
+    with _SHARED_LOCK:
+        if token not in _SHARED:
+            _SHARED[token] = ChartIndex(shared_client(token), path)
+        elif path is not None and _SHARED[token].path != path:
+            _SHARED[token].bind(path)
+        return _SHARED[token]
@@ -2,11 +2,15 @@ import pandas as pd
 import numpy as np
 from pandas import Timestamp
 
-from dw_squared import PALETTE
+from dw_squared import palette
 from dw_squared.client import DWSquared
+from dw_squared.downsample import downsample
+from dw_squared.resample import resample
 
 
 class Lines(DWSquared):
+    dw_type = 'd3-lines'
+
     def __init__(self,
                  data: pd.DataFrame = None,
                  title: str = '',
@@ -18,10 +22,13 @@ class Lines(DWSquared):
                  display_today: bool = True,
                  height: int = None,
                  width: int = None,
+                 decimals: int = None,
                  token: str = None,
                  secondary=False,
                  secondary_unit='',
                  interpolation="linear",
+                 max_points: int = None,
+                 downsampling: str = 'lttb',
                  *args,
                  **kwargs,
                  ):
@@ -29,6 +36,7 @@ class Lines(DWSquared):
                          graph_start, graph_end, source, notes, True)
         self.frame = data
         self.title = title
+        self.decimals = decimals
         self.source = source
         self.notes = notes
         self.display_today = display_today
@@ -36,17 +44,19 @@ class Lines(DWSquared):
         self.secondary = secondary
         self.secondary_unit = secondary_unit
         self.interpolation = interpolation
+        self.max_points = max_points
+        self.downsampling = downsampling
         self._data = self.reshape_data(self.frame)
 
     @property
     def chart(self):
         if self._chart is None:
             self._chart = self.dw.create_chart(
-                self.title, chart_type='d3-lines', data=self._data)
+                self.title, chart_type=self.dw_type, data=self.payload(self._data))
         return self._chart
 
     def reshape_data(self, frame: pd.DataFrame):
-        _frame = frame.interpolate(self.interpolation)
+        _frame = resample(frame, interpolation=self.interpolation)
         if self.secondary:
             assert _frame.shape[1] == 2, "Not compatible with more than two series"
             means = _frame.mean()
@@ -55,18 +65,23 @@ class Lines(DWSquared):
             self.rescaled = 0.90 * means[0] + stds[0] * \
                 ((_frame.iloc[:, -1] - means[-1]) / stds[-1])
             _frame.iloc[:, 1] = self.rescaled
-        self._data = self.slice_and_reset_index(_frame)
+        _data = self.slice_and_reset_index(_frame)
+        self.anchors = []
+        if self.secondary:
+            splits = np.array_split(_data['index'], 5)
+            self.anchors = [x.iloc[-1] for x in splits[:-1]]
+        self._data = downsample(_data, self.max_points,
+                                self.downsampling, self.anchors)
         return self._data
 
-    def update_data(self, frame):
-        return self._update_data(frame, self.reshape_data)
+    def update_data(self, frame, state=None):
+        return self._update_data(frame, self.reshape_data, state=state)
 
     def compute_metadata(self):
-        splits = []
+        anchors = pd.Series(dtype=float)
         if self.secondary:
             assert self._data.shape[1] > 1, "must be multivariate and plots with secondary line"
-            splits = np.array_split(self._data.set_index('index').iloc[:, -1], 5)
-        palette = {legend: next(PALETTE) for legend in self._data.columns[1:]}
+            anchors = self._data.set_index('index').iloc[:, -1].loc[self.anchors]
         label_policy = 'right' if self.secondary else 'top' if self._data.shape[1] > 2 else 'none'
         extra_properties = {
             'data': {
@@ -80,7 +95,7 @@ class Lines(DWSquared):
             'visualize': {
                 'x-grid': 'ticks',
                 'y-grid': 'on',
-                'custom-colors': palette,
+                'custom-colors': palette(self._data.columns[1:]),
                 'scale-y': 'linear',
                 'labeling': label_policy,
                 'base-color': 7,
@@ -90,7 +105,7 @@ class Lines(DWSquared):
                 'y-grid-labels': 'inside',
                 "line-symbols": False,
                 "text-annotations": [
-                    {'x': x.index[-1].strftime('%Y/%m/%d %H:%M'),
+                    {'x': x.strftime('%Y/%m/%d %H:%M'),
                      "connectorLine":{
                          'enabled': True,
                          "stroke": 1,
@@ -98,13 +113,13 @@ class Lines(DWSquared):
                          'type': "straight",
                          'arrowHead': False,
                     },
-                        'y': x.iloc[-1],
+                        'y': y,
                         'size': 10,
                         "align": "mc",
                         'dx': 0,
                         'dy': 40,
-                        'text': f"{self.unscaled[x.index[-1]]:.1f} {self.secondary_unit}"}
-                    for x in splits[:-1]] if self.secondary else [],
+                        'text': f"{self.unscaled[x]:.1f} {self.secondary_unit}"}
+                    for x, y in anchors.items()] if self.secondary else [],
             }
         }
         extra_properties.update(self.default_publish)
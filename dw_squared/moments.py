@@ -1,10 +1,11 @@
 from datetime import datetime
+from functools import lru_cache
 from dateutil.relativedelta import relativedelta
 from dateutil import parser
 
 import pandas as pd
 
-from psyl.lisp import evaluate, Env
+from psyl.lisp import expreval, parse, Env
 
 
 def lastoccurrenceof(ref_date, month, day):
@@ -53,7 +54,33 @@ ENV = Env({
 })
 
 
-def evaluate_not_none(expr):
-    if pd.isnull(expr):
-        return None
-    return pd.to_datetime(evaluate(expr, ENV))
\ No newline at end of file
+@lru_cache(maxsize=None)
+def compile_expr(expr):
+    return parse(expr)
+
+
+class Moments():
+
+    def __init__(self, now: datetime = None) -> None:
+        now = now or datetime.now()
+        self.now = date_to_datetime(now)
+        self.today = date_to_datetime(now.date())
+        self.env = Env({**ENV, 'now': self._now, 'today': self._today})
+        self._results = dict()
+
+    def _now(self):
+        return self.now
+
+    def _today(self):
+        return self.today
+
+    def evaluate(self, expr):
+        if pd.isnull(expr):
+            return None
+        if expr not in self._results:
+            self._results[expr] = pd.to_datetime(expreval(compile_expr(expr), self.env))
+        return self._results[expr]
+
+
+def evaluate_not_none(expr, moments: Moments = None):
+    return (moments or Moments()).evaluate(expr)
\ No newline at end of file
@@ -1,26 +1,64 @@
 from itertools import cycle
+from functools import partial
+import asyncio
+import collections.abc
 import json
 import requests as r
 from pandas import Timestamp
 from datetime import datetime as dt
+from copy import deepcopy
 from dateutil.relativedelta import relativedelta
 
 import pandas as pd
-import datawrapper
 
-from dw_squared import nest_update
+from dw_squared import nest_diff, nest_patch, nest_prune, nest_update
+from dw_squared.index import shared_index
+from dw_squared.state import fingerprint
+from dw_squared.transport import CSVPayload, NotFoundError, shared_client
+
+# visualize subtrees that are replaced, not merged, on upsert
+REPLACED = ('rows', 'columns')
+
 
 class _DWSquared():
+    decimals = None
+
     def __init__(self, title, token) -> None:
         self.title = title
-        self.dw = datawrapper.Datawrapper(access_token=token)
+        self.dw = shared_client(token)
+        self.index = shared_index(token)
+
+    def content_hash(self, data):
+        return fingerprint(data, {})
+
+    def payload(self, data):
+        return CSVPayload(data, self.decimals)
 
-    def _update_data(self, data, transformation, *args, **kwargs) -> pd.DataFrame:
-        search = {x['title']: x['id'] for x in self.dw.get_charts()}
-        id = search[self.title]
+    def _update_data(self, data, transformation, *args, state=None, **kwargs) -> pd.DataFrame:
+        id = self.index[self.title]
         data = transformation(data, *args, **kwargs)
-        self.dw.add_data(id, data=data)
-        return self.dw.publish_chart(id)
+        if state is not None:
+            key = self.content_hash(data)
+            if state.unchanged(id, key):
+                return None
+        try:
+            self.dw.add_data(id, data=self.payload(data))
+        except NotFoundError:
+            self.forget(id, state)
+            published = self.create(data=data)
+        else:
+            published = self.dw.publish_chart(id)
+        if state is not None:
+            state.set(self.index[self.title], key)
+        return published
+
+    def forget(self, id, state=None):
+        self.index.discard(self.title)
+        if state is not None:
+            state.discard(id)
+
+    def create(self, previous=None, state=None, data=None):
+        raise NotImplementedError()
 
 
 class DWSquared(_DWSquared):
@@ -38,15 +76,19 @@ class DWSquared(_DWSquared):
         self.height, self.width = height, width
         self.source, self.notes = source, notes
         self.graph_start, self.graph_end = graph_start, graph_end
+        self.reset = reset
         self._metadata = {} if not reset else {'visualize': {}}
         self._chart = None
 
     @property
     def metadata(self):
         if not self._metadata:
-            charts = self.get_charts(self.title)
-            if charts:
-                props = self.dw.chart_properties(charts[0]['id'])
+            id = self.index.get(self.title)
+            if id is not None:
+                try:
+                    props = self.dw.chart_properties(id)
+                except NotFoundError:
+                    return self._metadata
                 self._metadata = props['metadata']
         return self._metadata
 
@@ -93,6 +135,20 @@ class DWSquared(_DWSquared):
         }
         return range_annotation
 
+    @property
+    def chart_data(self):
+        return self._data
+
+    def append(self, tail: pd.DataFrame):
+        self.frame = tail.combine_first(self.frame)[self.frame.columns]
+        return self.reshape_data(self.frame)
+
+    def update_tail(self, tail: pd.DataFrame, state=None):
+        return self._update_data(tail, self.append, state=state)
+
+    def content_hash(self, data):
+        return fingerprint(data, self.compute_metadata())
+
     def get_charts(self, search='', *args, **kwargs):
         return self.dw.get_charts(search=search, *args, **kwargs)
 
@@ -118,12 +174,112 @@ class DWSquared(_DWSquared):
             }
         }
 
-    def publish(self):
+    def upsert(self, id):
+        self._chart = {'id': id}
+        current = self.dw.chart_properties(id)
+        self.dw.add_data(id, data=self.payload(self.chart_data))
+        source = current.get('metadata', {}).get('describe', {}).get('source-name')
+        if source != self.source:
+            self.decription()
+        extra_properties = self.compute_metadata()
+        metadata = deepcopy(current.get('metadata', {}))
+        changed = nest_update(nest_diff(metadata, extra_properties),
+                              self.stale_metadata(metadata, extra_properties))
+        if changed:
+            self.dw.update_metadata(id, changed)
+        self._metadata = nest_patch(metadata, changed)
+        return self.dw.publish_chart(id)
+
+    def stale_metadata(self, current, computed):
+        visualize = computed.get('visualize', {})
+        if self.reset:
+            keys = [k for k, v in visualize.items()
+                    if isinstance(v, collections.abc.Mapping)]
+        else:
+            keys = [k for k in REPLACED if k in visualize]
+        stored = current.get('visualize', {})
+        pruned = {k: nest_prune(stored[k], visualize[k]) for k in keys
+                  if isinstance(stored.get(k), collections.abc.Mapping)}
+        pruned = {k: v for k, v in pruned.items() if v}
+        return {'visualize': pruned} if pruned else {}
+
+    def publish(self, upsert=False, state=None):
+        previous = self.index.get(self.title)
+        if state is not None:
+            key = self.content_hash(self.chart_data)
+            if state.unchanged(previous, key):
+                return None
+        if upsert and previous is not None:
+            try:
+                published = self.upsert(previous)
+            except NotFoundError:
+                self.forget(previous, state)
+                published = self.create()
+        else:
+            published = self.create(previous, state)
+        if state is not None:
+            state.set(self.chart['id'], key)
+        return published
+
+    def forget(self, id, state=None):
+        super().forget(id, state)
+        self._chart = None
+
+    def create(self, previous=None, state=None, data=None):
+        if data is not None:
+            self._chart = self.dw.create_chart(
+                self.title, chart_type=self.dw_type, data=self.payload(data))
         self.decription()
         extra_properties = self.compute_metadata()
         self._metadata = nest_update(self.metadata, extra_properties)
-        self.dw.update_metadata(self.chart['id'], self.metadata)
-        search = {x['title']: x['id'] for x in self.dw.get_charts()}
-        if self.title in search:
-            self.dw.delete_chart(search[self.title])
+        changed = nest_diff(self.chart.get('metadata', {}), self.metadata)
+        if changed:
+            self.dw.update_metadata(self.chart['id'], changed)
+        if previous is not None and previous != self.chart['id']:
+            try:
+                self.dw.delete_chart(previous)
+            except NotFoundError:
+                pass
+            if state is not None:
+                state.discard(previous)
+        self.index.add(self.title, self.chart['id'])
         return self.dw.publish_chart(self.chart['id'])
+
+    async def apublish(self, upsert=False, state=None, executor=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, partial(self.publish, upsert=upsert, state=state))
+
+
+class PreparedChart(DWSquared):
+    def __init__(self,
+                 title: str,
+                 token: str,
+                 dw_type: str,
+                 payload: str,
+                 metadata: dict,
+                 key: str,
+                 source: str = '',
+                 notes: str = '',
+                 reset: bool = False):
+        super().__init__(title, token, source=source, notes=notes, reset=reset)
+        self.dw_type = dw_type
+        self._data = payload
+        self._computed = metadata
+        self._key = key
+
+    @property
+    def chart(self):
+        if self._chart is None:
+            self._chart = self.dw.create_chart(
+                self.title, chart_type=self.dw_type, data=self._data)
+        return self._chart
+
+    def payload(self, data):
+        return data
+
+    def content_hash(self, data):
+        return self._key
+
+    def compute_metadata(self):
+        return self._computed
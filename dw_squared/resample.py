@@ -0,0 +1,107 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def _digest(values) -> bytes:
+    if values.dtype.kind in 'fiubM' and getattr(values.dtype, 'tz', None) is None:
+        data = np.ascontiguousarray(values.to_numpy())
+        return hashlib.sha1(str(data.dtype).encode() + data.tobytes()).digest()
+    return hashlib.sha1(
+        pd.util.hash_pandas_object(values, index=False).values.tobytes()).digest()
+
+
+def _aggregate(frame: pd.DataFrame, freq, agg) -> pd.DataFrame:
+    if not isinstance(agg, dict):
+        return frame.resample(freq).agg(agg)
+    groups = dict()
+    for name in frame.columns:
+        groups.setdefault(agg[name], []).append(name)
+    if len(groups) == 1:
+        return frame.resample(freq).agg(next(iter(groups)))
+    parts = [frame[names].resample(freq).agg(func) for func, names in groups.items()]
+    return pd.concat(parts, axis=1)[frame.columns]
+
+
+def _resample(frame: pd.DataFrame, freq, agg, interpolation) -> pd.DataFrame:
+    if freq is not None:
+        frame = _aggregate(frame, freq, agg)
+    if interpolation is not None:
+        frame = frame.interpolate(method=interpolation)
+    return frame
+
+
+class ResampleCache():
+
+    def __init__(self, max_bytes: int = 256 * 2 ** 20) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits, self.misses = 0, 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            serie = self._entries.get(key)
+            if serie is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return serie
+
+    def _set(self, key, serie: pd.Series):
+        nbytes = int(serie.memory_usage(index=True, deep=False))
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = serie
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= int(evicted.memory_usage(index=True, deep=False))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def resample(self, frame: pd.DataFrame, freq: str = None, agg='mean',
+                 interpolation: str = None) -> pd.DataFrame:
+        if not frame.columns.is_unique or not len(frame.columns):
+            return _resample(frame, freq, agg, interpolation)
+        aggs = {name: agg[name] if isinstance(agg, dict) else agg
+                for name in frame.columns}
+        index = _digest(frame.index)
+        keys = {name: (index, _digest(frame[name]), freq, aggs[name], interpolation)
+                for name in frame.columns}
+        parts = {name: self._get(key) for name, key in keys.items()}
+        missing = [name for name, serie in parts.items() if serie is None]
+        if missing:
+            fresh = _resample(frame[missing], freq,
+                              {name: aggs[name] for name in missing}, interpolation)
+            for name in missing:
+                parts[name] = fresh[name]
+                self._set(keys[name], fresh[name].copy())
+        result = pd.concat(parts.values(), axis=1, keys=list(parts))
+        result.columns.name = frame.columns.name
+        return result
+
+
+RESAMPLE_CACHE = ResampleCache()
+
+
+def configure_resample_cache(max_bytes: int) -> ResampleCache:
+    global RESAMPLE_CACHE
+    RESAMPLE_CACHE = ResampleCache(max_bytes)
+    return RESAMPLE_CACHE
+
+
+def resample(frame: pd.DataFrame, freq: str = None, agg='mean',
+             interpolation: str = None) -> pd.DataFrame:
+    return RESAMPLE_CACHE.resample(frame, freq, agg, interpolation)
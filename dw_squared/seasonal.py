@@ -1,3 +1,6 @@
+from copy import deepcopy
+from typing import Dict
+
 from pandas import Timestamp
 import pandas as pd
 import numpy as np
@@ -5,14 +8,27 @@ import numpy as np
 from dw_squared.client import DWSquared
 
 from dw_squared import PALETTE
+from pandas.tseries.frequencies import to_offset
+
+from dw_squared.resample import resample
+
 from dw_squared.transform import (
-    compute_seasonal_stats_unfolded,
+    broadcast_stats,
+    bucket_label,
     generate_seasonal_frame,
-    compute_seasonal_stats
+    compute_seasonal_stats,
+    seasonal_frames,
+    unfolded_stats_names,
+    unfolded_stats_table,
+    unfolded_stats_tables,
 )
 
+LOCAL_INTERPOLATIONS = (None, 'linear', 'time', 'index', 'values', 'nearest',
+                        'pad', 'ffill', 'backfill', 'bfill')
+
 
 class Seasonal(DWSquared):
+    dw_type = 'd3-lines'
 
     def __init__(self,
                  data: pd.DataFrame = None,
@@ -27,9 +43,12 @@ class Seasonal(DWSquared):
                  graph_start: Timestamp=None,
                  graph_end: Timestamp=None,
                  unfold: bool = True,
+                 extra_stats: list = (),
                  height: int = None,
                  width: int = None,
+                 decimals: int = None,
                  token: str = None,
+                 reshape: bool = True,
                  *args,
                  **kwargs,
                  ):
@@ -38,6 +57,7 @@ class Seasonal(DWSquared):
         assert data.shape[1] == 1, "Data must be univariate for seasonal plots"
         self.series = data
         self.title = title
+        self.decimals = decimals
         self.source = source
         self.notes = notes
         self.interpolation = interpolation
@@ -48,16 +68,69 @@ class Seasonal(DWSquared):
         if self.cutoff_year is None:
             self.cutoff_year = self.today.year
         self.unfold = unfold
-        self.reshaped_data_unfold(data) if unfold else self.reshape_data(data)
+        self.extra_stats = tuple(extra_stats)
+        if reshape:
+            self._reshape(data)
+
+    @classmethod
+    def batch(cls, data: pd.DataFrame, title: str = '', **kwargs) -> Dict[str, 'Seasonal']:
+        plots = {name: cls(data=data[[name]], title=f'{title} {name}'.strip(),
+                           reshape=False, **kwargs)
+                 for name in data.columns}
+        if plots:
+            head = next(iter(plots.values()))
+            if head.unfold:
+                head._batch_unfold(data, plots)
+            else:
+                head._batch_seasonal(data, plots)
+        return plots
+
+    def _batch_unfold(self, data, plots):
+        raw = resample(data, self.freq_graph, self.aggregation_freq_graph)
+        resampled = resample(data, self.freq_graph, self.aggregation_freq_graph,
+                             self.interpolation)
+        stats = unfolded_stats_names(resampled, self.cutoff_year, self.extra_stats)
+        tables = unfolded_stats_tables(resampled, self.freq_graph,
+                                       self.cutoff_year, stats)
+        for name, plot in plots.items():
+            plot._raw = raw[[name]]
+            plot._resampled = resampled[[name]]
+            plot.columns_definition = deepcopy(stats)
+            plot._stats_table = tables[name]
+            plot._unfolded = broadcast_stats(
+                plot._resampled, plot._stats_table, self.freq_graph)
+            plot._data_stats = plot.slice_and_reset_index(plot._unfolded)
+
+    def _batch_seasonal(self, data, plots):
+        resampled = resample(data, self.freq_graph, self.aggregation_freq_graph,
+                             self.interpolation)
+        frames = seasonal_frames(resampled, self.freq_graph,
+                                 self.aggregation_freq_graph)
+        for name, plot in plots.items():
+            plot._seasonal, plot.columns_definition = compute_seasonal_stats(
+                frames[name], cutoff_year=self.cutoff_year,
+                extra_stats=self.extra_stats)
+            plot._data_stats = plot._seasonal.reset_index()
+
+    def _interpolate(self, frame):
+        if self.interpolation is None:
+            return frame
+        return frame.interpolate(method=self.interpolation)
 
     def reshaped_data_unfold(self, series):
         self._data_stats = None
         if series is not None:
-            self._data_stats, self.columns_definition = compute_seasonal_stats_unfolded(
-                series, self.interpolation,
-                self.freq_graph, self.aggregation_freq_graph, self.cutoff_year
-            )
-            self._data_stats = self.slice_and_reset_index(self._data_stats)
+            self._raw = resample(series, self.freq_graph, self.aggregation_freq_graph)
+            self._resampled = resample(series, self.freq_graph,
+                                       self.aggregation_freq_graph, self.interpolation)
+            self.columns_definition = unfolded_stats_names(
+                self._resampled, self.cutoff_year, self.extra_stats)
+            self._stats_table = unfolded_stats_table(
+                self._resampled, self.freq_graph,
+                self.cutoff_year, self.columns_definition)
+            self._unfolded = broadcast_stats(
+                self._resampled, self._stats_table, self.freq_graph)
+            self._data_stats = self.slice_and_reset_index(self._unfolded)
         return self._data_stats
 
     def reshape_data(self, series):
@@ -67,20 +140,83 @@ class Seasonal(DWSquared):
                 series, self.interpolation,
                 self.freq_graph, self.aggregation_freq_graph
             )
-            self._data_stats, self.columns_definition = compute_seasonal_stats(
-                _data, cutoff_year=self.cutoff_year)
-            self._data_stats = self._data_stats.reset_index()
+            self._seasonal, self.columns_definition = compute_seasonal_stats(
+                _data, cutoff_year=self.cutoff_year,
+                extra_stats=self.extra_stats)
+            self._data_stats = self._seasonal.reset_index()
         return self._data_stats
 
+    def _reshape(self, series):
+        if self.unfold:
+            return self.reshaped_data_unfold(series)
+        return self.reshape_data(series)
+
+    def _append_unfolded(self, label):
+        offset = to_offset(self.freq_graph)
+        fresh = (self.series.loc[label - 2 * offset:]
+                 .resample(self.freq_graph)
+                 .agg(self.aggregation_freq_graph))
+        raw = pd.concat([self._raw[self._raw.index < label],
+                         fresh[fresh.index >= label]])
+        valid = raw[raw.index < label].dropna(how='all')
+        start = valid.index[-1] if len(valid) else raw.index[0]
+        window = self._interpolate(raw.loc[start:])
+        self._raw = raw
+        self._resampled = pd.concat(
+            [self._resampled[self._resampled.index < start], window])
+        rows = broadcast_stats(window, self._stats_table, self.freq_graph)
+        self._unfolded = pd.concat(
+            [self._unfolded[self._unfolded.index < start], rows])
+        self._data_stats = self.slice_and_reset_index(self._unfolded)
+        return self._data_stats
+
+    def _append_seasonal(self, label):
+        offset = to_offset(self.freq_graph)
+        year_start = pd.Timestamp(label.year, 1, 1)
+        valid = self.series.loc[:year_start].dropna(how='all')
+        start = valid.index[-1] if len(valid) else year_start
+        fresh = generate_seasonal_frame(
+            self.series.loc[start - 2 * offset:], self.interpolation,
+            self.freq_graph, self.aggregation_freq_graph
+        )
+        if len(fresh.index.difference(self._seasonal.index)):
+            return self.reshape_data(self.series)
+        seasonal = self._seasonal.copy()
+        for year in fresh.columns[fresh.columns >= label.year]:
+            seasonal[year] = fresh[year].reindex(seasonal.index)
+        stats = [x['name'] for x in self.columns_definition.values()]
+        years = sorted(x for x in seasonal.columns if x not in stats)
+        self._seasonal = seasonal[years + stats]
+        self._data_stats = self._seasonal.reset_index()
+        return self._data_stats
+
+    def append(self, tail: pd.DataFrame):
+        tail = tail.dropna(how='all')
+        if tail.empty:
+            return self._data_stats
+        self.series = tail.combine_first(self.series)[self.series.columns]
+        label = bucket_label(tail.index.min(), self.freq_graph)
+        if self.interpolation not in LOCAL_INTERPOLATIONS:
+            return self._reshape(self.series)
+        if self.unfold and label > pd.Timestamp(self.cutoff_year, 1, 1):
+            return self._append_unfolded(label)
+        if not self.unfold and label.year >= self.cutoff_year:
+            return self._append_seasonal(label)
+        return self._reshape(self.series)
+
     @property
     def chart(self):
         if self._chart is None:
             self._chart = self.dw.create_chart(
-                self.title, chart_type='d3-lines', data=self._data_stats)
+                self.title, chart_type=self.dw_type, data=self.payload(self._data_stats))
         return self._chart
 
-    def update_data(self, frame):
-        return self._update_data(frame, self.reshape_data if self.unfold else self.reshaped_data_unfold)
+    @property
+    def chart_data(self):
+        return self._data_stats
+
+    def update_data(self, frame, state=None):
+        return self._update_data(frame, self._reshape, state=state)
 
     def compute_metadata(self):
         name = self._data_stats.columns[1]
@@ -0,0 +1,63 @@
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+def shareable(frame: pd.DataFrame) -> bool:
+    return (isinstance(frame.index, pd.DatetimeIndex)
+            and all(x.kind == 'f' for x in frame.dtypes))
+
+
+class SharedFrame():
+
+    def __init__(self, frame: pd.DataFrame) -> None:
+        self._shm = None
+        if not shareable(frame):
+            self.spec = {'frame': frame}
+            return
+        values = np.ascontiguousarray(frame.to_numpy(dtype=float))
+        stamps = frame.index.as_unit('ns').asi8
+        self._shm = SharedMemory(create=True, size=max(values.nbytes + stamps.nbytes, 1))
+        buffer = np.ndarray(values.size + stamps.size, dtype='float64', buffer=self._shm.buf)
+        buffer[:values.size] = values.ravel()
+        buffer[values.size:] = stamps.view('float64')
+        del buffer
+        self.spec = {
+            'name': self._shm.name,
+            'shape': values.shape,
+            'columns': list(frame.columns),
+            'tz': None if frame.index.tz is None else str(frame.index.tz),
+            'index_name': frame.index.name,
+        }
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def attach_frame(spec: Dict) -> pd.DataFrame:
+    if 'frame' in spec:
+        return spec['frame']
+    rows, cols = spec['shape']
+    shm = SharedMemory(name=spec['name'])
+    try:
+        buffer = np.ndarray(rows * cols + rows, dtype='float64', buffer=shm.buf)
+        values = buffer[:rows * cols].reshape(rows, cols).copy()
+        stamps = buffer[rows * cols:].view('int64').copy()
+        del buffer
+    finally:
+        shm.close()
+    index = pd.DatetimeIndex(stamps.view('datetime64[ns]'), name=spec['index_name'])
+    if spec['tz'] is not None:
+        index = index.tz_localize('UTC').tz_convert(spec['tz'])
+    return pd.DataFrame(values, index=index, columns=spec['columns'])
@@ -0,0 +1,57 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+
+import pandas as pd
+
+
+def fingerprint(data: pd.DataFrame, metadata: Dict) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(c) for c in data.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+    digest.update(json.dumps(metadata, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class FingerprintStore():
+
+    def __init__(self, path: str = None, autosave: bool = True) -> None:
+        self.path = path
+        self.autosave = autosave
+        self._lock = threading.RLock()
+        self._fingerprints = dict()
+        if self.path is not None and os.path.exists(self.path):
+            with open(self.path, 'r') as stream:
+                self._fingerprints = json.load(stream)
+
+    def get(self, chart_id: str) -> Optional[str]:
+        return self._fingerprints.get(chart_id)
+
+    def unchanged(self, chart_id: str, value: str) -> bool:
+        return chart_id is not None and self.get(chart_id) == value
+
+    def set(self, chart_id: str, value: str):
+        with self._lock:
+            self._fingerprints[chart_id] = value
+            if self.autosave:
+                self.save()
+
+    def discard(self, chart_id: str):
+        with self._lock:
+            self._fingerprints.pop(chart_id, None)
+            if self.autosave:
+                self.save()
+
+    def save(self):
+        if self.path is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with self._lock:
+            # a crash mid-write must not truncate the previous state
+            with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp',
+                                             delete=False) as stream:
+                json.dump(self._fingerprints, stream)
+            os.replace(stream.name, self.path)
@@ -1,8 +1,13 @@
+from functools import lru_cache
 from typing import Dict
+import re
+
+import numpy as np
 import pandas as pd
 from pandas import Timestamp
 
 from dw_squared.client import DWSquared
+from dw_squared.resample import resample
 
 PRETTY_DATES = {
     'D': '%d %b',
@@ -47,61 +52,153 @@ BOLD = {
 }
 
 
+def format_decimals(numeral_format):
+    numeral_format = numeral_format or "0.0"
+    _, _, fraction = numeral_format.partition('.')
+    decimals = fraction.count('0')
+    if '%' in numeral_format:
+        decimals += 2
+    return decimals
+
+
+LEVEL_KEY = re.compile(r'^L\d+$')
+
+
+def style_level(level: int) -> str:
+    return f'L{min(level, 3)}'
+
+
+def row_spec(dictionary) -> pd.DataFrame:
+    records = list()
+
+    def walk(node, depth, parent):
+        for child in node.get(f'L{depth}', []):
+            records.append({'level': depth, 'parent': parent,
+                            **{k: v for k, v in child.items() if not LEVEL_KEY.match(k)}})
+            walk(child, depth + 1, len(records) - 1)
+
+    walk(dictionary, 1, -1)
+    if not records:
+        return pd.DataFrame(columns=['level', 'parent'])
+    return pd.DataFrame.from_records(records)
+
+
+def spec_values(spec: pd.DataFrame, key):
+    if key not in spec.columns:
+        return [None] * len(spec)
+    values = spec[key].astype(object)
+    return values.where(values.notna(), None).tolist()
+
+
+def rolled_up(spec: pd.DataFrame) -> np.ndarray:
+    parents = spec['parent'].to_numpy(dtype='int64')
+    has_children = np.zeros(len(spec), dtype=bool)
+    has_children[parents[parents >= 0]] = True
+    levels = np.array([x is not None for x in spec_values(spec, 'aggregation_level')],
+                      dtype=bool)
+    return has_children & levels
+
+
+def rollup(frame: pd.DataFrame, spec: pd.DataFrame) -> pd.DataFrame:
+    levels = spec['level'].to_numpy(dtype='int64')
+    parents = spec['parent'].to_numpy(dtype='int64')
+    aggs = spec_values(spec, 'aggregation_level')
+    rolled = rolled_up(spec)
+    values = frame.to_numpy(dtype=float).T.copy()
+    for level in range(levels.max(initial=1), 1, -1):
+        children = np.flatnonzero((levels == level) & rolled[np.maximum(parents, 0)])
+        if not len(children):
+            continue
+        block = pd.DataFrame(values[children], index=parents[children])
+        funcs = np.array([aggs[x] for x in block.index], dtype=object)
+        for func in set(funcs):
+            grouped = block[funcs == func].groupby(level=0)
+            result = grouped.sum(min_count=1) if func == 'sum' else grouped.agg(func)
+            values[result.index.to_numpy()] = result.to_numpy(dtype=float)
+    return pd.DataFrame(values.T, index=frame.index, columns=frame.columns)
+
+
 def within_key(dictionary, key):
-    result = {
-        level: list()
-        for level in ['L1', 'L2', 'L3']
-    }
-    if 'L1' in dictionary:
-        for l1 in dictionary['L1']:
-            result['L1'].append(l1[key])
-            if 'L2' in l1:
-                for l2 in l1['L2']:
-                    result['L2'].append(l2[key])
-                    if 'L3' in l2:
-                        for l3 in l2['L3']:
-                            result['L3'].append(l3[key])
+    spec = row_spec(dictionary)
+    depth = max([3, *spec['level']])
+    result = {f'L{level}': list() for level in range(1, depth + 1)}
+    for level, value in zip(spec['level'], spec_values(spec, key)):
+        result[f'L{level}'].append(value)
     return result
 
 
 def triple_loop_list(dictionary, key):
-    result = list()
-    if 'L1' in dictionary:
-        for l1 in dictionary['L1']:
-            if key in l1:
-                result.append(l1[key])
-            else:
-                result.append(None)
-            if 'L2' in l1:
-                for l2 in l1['L2']:
-                    if key in l2:
-                        result.append(l2[key])
-                    else:
-                        result.append(None)
-                    if 'L3' in l2:
-                        for l3 in l2['L3']:
-                            if key in l1:
-                                result.append(l3[key])
-                            else:
-                                result.append(None)
-    return result
+    return spec_values(row_spec(dictionary), key)
 
 
 def triple_loop_dict(dictionary, key, val):
-    result = dict()
-    if 'L1' in dictionary:
-        for l1 in dictionary['L1']:
-            if 'L2' in l1:
-                for l2 in l1['L2']:
-                    if 'L3' in l2:
-                        for l3 in l2['L3']:
-                            result[l3[key]] = l3[val]
-                    result[l2[key]] = l2[val]
-            result[l1[key]] = l1[val]
-    return result
+    spec = row_spec(dictionary)
+    return dict(zip(spec_values(spec, key), spec_values(spec, val)))
+
+
+def row_style(level: str, precision: str) -> Dict:
+    return {
+        "borderBottom": BOTTOM_BORDER[level],
+        "borderBottomColor": "#333333",
+        "borderTop": TOP_BORDER[level],
+        "borderTopColor": "#333333",
+        'format': precision if precision is not None else "0.0",
+        'overrideFormat': True,
+        'style': {
+            'background': BACKGROUND[level],
+            'fontSize': FONT_SIZE[level],
+            'bold': BOLD[level],
+            'italic': False,
+            'underline': False,
+        },
+    }
+
+
+@lru_cache(maxsize=256)
+def row_styles(levels: tuple, precision: tuple) -> Dict:
+    rows = {f'row-{i}': row_style(level, prec)
+            for i, (level, prec) in enumerate(zip(levels, precision))}
+    if rows:
+        last = f'row-{len(rows) - 1}'
+        rows[last] = {**rows[last], 'borderBottom': "3px",
+                      'borderBottomColor': "#333333"}
+    return rows
+
+
+SPARKLINE = {
+    'color': "#c71e1d",
+    'dotFirst': True,
+    'height': 20,
+    'stroke': 2,
+    'dotLast': True,
+    'enabled': True,
+    'type': "line",
+}
+
+
+@lru_cache(maxsize=256)
+def column_styles(columns: tuple, n_sparky: int, now: int) -> Dict:
+    col_properties = dict()
+    for i, column in enumerate(columns):
+        style = {
+            'sortable': False,
+            'sparkline': {},
+            'format': '0.0',
+            'fixedWidth': False,
+            'minWidth': 15,
+        }
+        if i in (now + 1, now + 2):
+            style.update({'borderLeft': "1px", 'borderLeftColor': "#333333"})
+        if i > 0 and i <= n_sparky:
+            style.update({'fixedWidth': True, 'minWidth': 150,
+                          'sparkline': dict(SPARKLINE)})
+        col_properties[column] = style
+    return col_properties
 
 
 class Table(DWSquared):
+    dw_type = 'tables'
+
     def __init__(self,
                  table_config: Dict,
                  freq_table: str,
@@ -127,129 +224,75 @@ class Table(DWSquared):
         self.prefix_unit = prefix_unit
         self.freq_table = freq_table
         self.table_config = table_config
-        self.levels = within_key(self.table_config, 'legend')
-        self.cols = triple_loop_list(self.table_config, "legend")
-        self.precision = triple_loop_list(self.table_config, "precision")
+        self.spec = row_spec(self.table_config)
+        self.cols = spec_values(self.spec, "legend")
+        self.precision = spec_values(self.spec, "precision")
+        self.level_cols = [style_level(x) for x in self.spec['level']]
+        self.indented = ['&nbsp&nbsp' * (level - 1) + col
+                         for level, col in zip(self.spec['level'], self.cols)]
+        self.decimals = max(map(format_decimals, self.precision), default=1)
         self._data = self.reshape_data(self.frame)
 
     @property
     def chart(self):
         if self._chart is None:
             self._chart = self.dw.create_chart(
-                self.title, chart_type='tables', data=self._data)
+                self.title, chart_type=self.dw_type, data=self.payload(self._data))
         return self._chart
 
+    def period_labels(self, index: pd.DatetimeIndex, formats: Dict):
+        return index.to_period(self.freq_table).strftime(formats[self.freq_table])
+
+    def transpose(self, frame: pd.DataFrame, formats: Dict):
+        return pd.DataFrame(frame.to_numpy().T,
+                            index=pd.Index(frame.columns, name=self.prefix_unit),
+                            columns=self.period_labels(frame.index, formats))
+
     def to_pretty_table(self, frame: pd.DataFrame):
-        _frame = frame.copy()
-        _frame.index = (_frame
-                        .index
-                        .to_period(self.freq_table)
-                        .strftime(PRETTY_DATES[self.freq_table])
-                        )
-        _frame = _frame.T
-        _frame.index.name = self.prefix_unit
-        return _frame
+        return self.transpose(frame, PRETTY_DATES)
 
     def to_sparkline(self, frame: pd.DataFrame):
-        _frame = frame.copy()
-        _frame.index = (_frame
-                        .index
-                        .to_period(self.freq_table)
-                        .strftime(SPARKLINE_DATES[self.freq_table])
-                        )
-        _frame = _frame.T
-        _frame.index.name = self.prefix_unit
-        return _frame
+        return self.transpose(frame, SPARKLINE_DATES)
 
     def order_and_indent(self, frame):
-
-        prefixes = {
-            'L1': '',
-            'L2': '&nbsp&nbsp',
-            'L3': '&nbsp&nbsp&nbsp&nbsp',
-        }
-
-        self.level_cols = [key for c in self.cols for key,
-                           val in self.levels.items() if c in val]
-        new_cols = {col: prefixes[lev]+col for lev,
-                    col in zip(self.level_cols, self.cols)}
-        return frame[self.cols].rename(columns=new_cols)
+        return frame[self.cols].set_axis(self.indented, axis=1)
 
     def _resample_data(self, frame: pd.DataFrame):
-        config_agg = triple_loop_dict(
-            self.table_config, 'legend', 'aggregation_freq')
-        return frame.resample(self.freq_table).agg(config_agg)
+        config_agg = dict(zip(self.cols, spec_values(self.spec, 'aggregation_freq')))
+        # rolled up parents are filled from their children afterwards
+        for name in np.asarray(self.cols, dtype=object)[rolled_up(self.spec)]:
+            config_agg.pop(name, None)
+        present = [x for x in frame.columns if x in config_agg]
+        resampled = resample(frame[present], self.freq_table, config_agg)
+        return resampled.reindex(columns=self.cols)
 
     def reshape_data(self, frame: pd.DataFrame):
-        self._resampled_frame = self._resample_data(frame)
-        indented_frame = self.order_and_indent(self._resampled_frame)
-        pretty = self.to_pretty_table(indented_frame)
-        sparky = self.to_sparkline(indented_frame)
-        _, self.n_sparky = sparky.shape
-        df = pd.concat((sparky, pretty), axis=1)
-        df.index = df.index.rename(self.prefix_unit)
+        self._resampled_frame = rollup(self._resample_data(frame), self.spec)
+        self._today_position = (self._resampled_frame.shape[0] +
+                                int(self._resampled_frame.index.searchsorted(self.today)))
+        values = self._resampled_frame.to_numpy().T
+        sparky = self.period_labels(self._resampled_frame.index, SPARKLINE_DATES)
+        pretty = self.period_labels(self._resampled_frame.index, PRETTY_DATES)
+        self.n_sparky = len(sparky)
+        df = pd.DataFrame(np.hstack([values, values]),
+                          index=pd.Index(self.indented, name=self.prefix_unit),
+                          columns=[*sparky, *pretty])
         return df.reset_index()
 
     def today_position(self):
-        return (self._resampled_frame.shape[0] +
-                sum(self._resampled_frame.index < self.today))
+        return self._today_position
 
-    def update_data(self, frame):
-        return self._update_data(frame, self.reshape_data)
+    def update_data(self, frame, state=None):
+        return self._update_data(frame, self.reshape_data, state=state)
 
     @property
     def update_row_level_style(self):
-        row_properties = dict()
-        for i, (row, prec) in enumerate(zip(self.level_cols, self.precision)):
-            name = f'row-{i}'
-            row_properties[name] = {
-                "borderBottom": BOTTOM_BORDER[row],
-                "borderBottomColor": "#333333",
-                "borderTop": TOP_BORDER[row],
-                "borderTopColor": "#333333",
-                'format': prec if prec is not None else "0.0",
-                'overrideFormat': True,
-                'style': {},
-            }
-            row_properties[name]['style'].update(
-                {'background': BACKGROUND[row],
-                 'fontSize': FONT_SIZE[row],
-                 'bold': BOLD[row],
-                 'italic': False,
-                 'underline': False}
-            )
-        row_properties[name]['borderBottom'] = "3px"
-        row_properties[name]['borderBottomColor'] = "#333333"
-        return row_properties
+        return row_styles(tuple(self.level_cols), tuple(self.precision))
 
     @property
     def update_cols_style(self):
-        now = self.today_position()
-        col_properties = dict()
-        for i, row in enumerate(self._data.columns):
-            col_properties[row] = {
-                'sortable': False,
-                'sparkline': {},
-                'format': '0.0',
-                'fixedWidth': False,
-                'minWidth': 15,
-            }
-            if i in (now + 1, now + 2):
-                col_properties[row].update({'borderLeft': "1px",
-                                            'borderLeftColor': "#333333"})
-            if i > 0 and i <= self.n_sparky:
-                col_properties[row].update({'fixedWidth': True,
-                                            'minWidth': 150})
-                col_properties[row]['sparkline'] = {
-                    'color': "#c71e1d",
-                    'dotFirst': True,
-                    'height': 20,
-                    'stroke': 2,
-                    'dotLast': True,
-                    'enabled': True,
-                    'type': "line",
-                }
-        return col_properties
+        return column_styles(tuple(self._data.columns), self.n_sparky,
+                             self.today_position())
 
     def compute_metadata(self):
         extra_properties = {
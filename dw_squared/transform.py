@@ -1,93 +1,210 @@
 from datetime import datetime as dt
 from typing import Dict, Tuple
+import calendar
+
+import numpy as np
 import pandas as pd
 
+from dw_squared.resample import resample
+
 
 def name_stats(name, date_range):
     return f'{name} {date_range[0]:%y}-{date_range[-1]:%y}'
 
 
+def seasonal_positions(index: pd.DatetimeIndex, year: int, leap_day: str = 'drop'):
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    days = index.values.astype('datetime64[D]')
+    months = days.astype('datetime64[M]')
+    day_of_month = (days - months.astype('datetime64[D]')).astype('int64')
+    month = months.astype('int64') % 12
+    keep = np.ones(len(days), dtype=bool)
+    if not calendar.isleap(year):
+        feb29 = (month == 1) & (day_of_month == 28)
+        if leap_day == 'merge':
+            day_of_month = np.where(feb29, 27, day_of_month)
+        else:
+            keep = ~feb29
+    target = ((np.datetime64(str(year), 'M') + month).astype('datetime64[D]')
+              + day_of_month)
+    return target, keep
+
+
+def seasonal_frames(resampled: pd.DataFrame,
+                    freq: str = 'W',
+                    agg: str = 'mean',
+                    leap_day: str = 'drop') -> Dict:
+
+    now = dt.utcnow()
+
+    target, keep = seasonal_positions(resampled.index, now.year, leap_day)
+    years = resampled.index.year[keep]
+    values = resampled.to_numpy(dtype=float)[keep]
+    dates, row = np.unique(target[keep], return_inverse=True)
+    columns, col = np.unique(years, return_inverse=True)
+    cell = row * len(columns) + col
+    grid = np.full((len(dates) * len(columns), values.shape[1]), np.nan)
+    if len(np.unique(cell)) == len(cell):
+        grid[cell] = values
+    else:
+        reduced = pd.DataFrame(values).groupby(cell).agg(agg)
+        grid[reduced.index.values] = reduced.values
+    grid = grid.reshape(len(dates), len(columns), values.shape[1])
+
+    index = pd.DatetimeIndex(dates.astype('datetime64[ns]'), name='index')
+    frames = dict()
+    for i, name in enumerate(resampled.columns):
+        df = pd.DataFrame(grid[:, :, i], index=index,
+                          columns=pd.Index(columns, name='year'))
+        df = df.resample(freq).agg(agg)
+        df.index.freq = None
+        frames[name] = df
+    return frames
+
+
 def generate_seasonal_frame(
         series: pd.DataFrame,
         interpolation=None,
         freq: str = 'W',
-        agg: str = 'mean'
+        agg: str = 'mean',
+        leap_day: str = 'drop',
 ) -> pd.DataFrame:
 
-    now = dt.utcnow()
+    resampled = resample(series, freq, agg, interpolation)
 
-    resampled = (series.resample(freq).agg(agg))
+    name = series.columns[0]
+    return seasonal_frames(resampled[[name]], freq, agg, leap_day)[name]
 
-    if interpolation is not None:
-        resampled = resampled.interpolate(method=interpolation)
 
-    df = (resampled
-          .reset_index()
-          .assign(year=lambda x: x['index'].dt.year,
-                  index=lambda x: x['index'].dt.strftime(f'%d-%m-{now.year}'))
-          .set_index(['index', 'year'])
-          .unstack(1)
-          )
-    df.index = pd.to_datetime(df.index, format="%d-%m-%Y", errors='coerce')
-    df = df.sort_index().resample(freq).agg(agg)
-    return df[series.columns[0]]
+def bucket_label(date: pd.Timestamp, freq: str) -> pd.Timestamp:
+    return pd.Series([0], index=[date]).resample(freq).sum().index[0]
 
 
-def compute_seasonal_stats_unfolded(series, interpolation, freq,
-                                    agg, 
-                                    cutoff_year: int = dt.utcnow().year) -> Tuple[pd.DataFrame, Dict]:
-
-    resampled = (series.resample(freq).agg(agg))
-    if interpolation is not None:
-        resampled = resampled.interpolate(method=interpolation)
-
+def unfold_key(index: pd.DatetimeIndex, freq: str) -> np.ndarray:
+    f_unfold = {
+        'D': lambda x: x.dayofyear,
+        'B': lambda x: x.dayofyear,
+        'W': lambda x: x.isocalendar()["week"],
+        'M': lambda x: x.month
+    }
+    return np.asarray(f_unfold[freq](index), dtype='int64')
+
+
+STATS_LABELS = {'min': 'Min', 'max': 'Max', 'mean': 'Mean', 'std': 'Std'}
+
+
+def stat_quantile(stat: str):
+    if stat[:1] != 'p':
+        return None
+    try:
+        quantile = float(stat[1:]) / 100
+    except ValueError:
+        return None
+    return quantile if 0 <= quantile <= 1 else None
+
+
+def grouped_stats(values: np.ndarray, keys: np.ndarray,
+                  stats=('min', 'max', 'mean')) -> Tuple[np.ndarray, Dict]:
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    groups, inverse = np.unique(keys, return_inverse=True)
+    result = {stat: np.full((len(groups), values.shape[1]), np.nan)
+              for stat in stats}
+    if not len(groups):
+        return groups, result
+    for j in range(values.shape[1]):
+        order = np.lexsort((values[:, j], inverse))
+        ordered = values[order, j]
+        starts = np.searchsorted(inverse[order], np.arange(len(groups)))
+        valid = ~np.isnan(ordered)
+        counts = np.add.reduceat(valid.astype('int64'), starts)
+        filled = np.where(valid, ordered, 0.)
+        sums = np.add.reduceat(filled, starts)
+        last = starts + np.maximum(counts, 1) - 1
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for stat in stats:
+                if stat == 'min':
+                    out = ordered[starts]
+                elif stat == 'max':
+                    out = ordered[last]
+                elif stat == 'mean':
+                    out = sums / counts
+                elif stat == 'std':
+                    sizes = np.diff(np.append(starts, len(ordered)))
+                    means = np.repeat(sums / counts, sizes)
+                    deviations = np.where(valid, ordered - means, 0.)
+                    squares = np.add.reduceat(deviations ** 2, starts)
+                    out = np.where(counts > 1, np.sqrt(squares / (counts - 1)), np.nan)
+                else:
+                    position = (np.maximum(counts, 1) - 1) * stat_quantile(stat)
+                    low, high = np.floor(position), np.ceil(position)
+                    lower = ordered[starts + low.astype('int64')]
+                    upper = ordered[starts + high.astype('int64')]
+                    out = lower + (upper - lower) * (position - low)
+                result[stat][:, j] = np.where(counts > 0, out, np.nan)
+    return groups, result
+
+
+def unfolded_stats_names(resampled: pd.DataFrame, cutoff_year: int,
+                         extra_stats=()) -> Dict:
     selected_formated = [resampled.index[0], dt(cutoff_year, 1, 1)]
-    stats = {
-        'min': {
-            'name': name_stats('Min', selected_formated),
-            'func': 'min',
-        },
-        'max': {
-            'name': name_stats('Max', selected_formated),
-            'func': 'max',
-        },
-        'mean': {
-            'name': name_stats('Mean', selected_formated),
-            'func': 'mean',
+    stats = dict()
+    for stat in ('min', 'max', 'mean', *extra_stats):
+        if stat not in STATS_LABELS and stat_quantile(stat) is None:
+            raise ValueError(f'Unknown seasonal statistic: {stat}')
+        stats[stat] = {
+            'name': name_stats(STATS_LABELS.get(stat, stat.upper()), selected_formated),
+            'func': stat,
         }
-    }
-    _stats = {k: v['name'] for k, v in stats.items()}
+    return stats
 
+
+def unfolded_stats_tables(resampled: pd.DataFrame, freq: str,
+                          cutoff_year: int, stats: Dict) -> Dict:
     seasonal = resampled.loc[:dt(cutoff_year, 1, 1)]
-    unfold_grouping = {
-        'D': seasonal.index.dayofyear,
-        'B': seasonal.index.dayofyear,
-        'W': seasonal.index.isocalendar()["week"],
-        'M': seasonal.index.month
-    }
-    f_unfold = {
-        'D': lambda x: x.index.dayofyear,
-        'B': lambda x: x.index.dayofyear,
-        'W': lambda x: x.index.isocalendar()["week"],
-        'M': lambda x: x.index.month
+    groups, result = grouped_stats(seasonal.to_numpy(dtype=float),
+                                   unfold_key(seasonal.index, freq),
+                                   [x['func'] for x in stats.values()])
+    return {name: pd.DataFrame({x['name']: result[x['func']][:, i]
+                                for x in stats.values()}, index=groups)
+            for i, name in enumerate(resampled.columns)}
 
-    }
-    seasonal = (seasonal
-                .groupby(unfold_grouping[freq])
-                .agg(("min", "max", "mean"))
-                .rename(columns=_stats)
-                [series.columns[0]])
 
-    result = (resampled
-              .assign(key=f_unfold[freq])
-              .merge(seasonal, left_on='key', right_index=True)
-              .drop("key", axis=1))
-    return result, stats
+def unfolded_stats_table(resampled: pd.DataFrame, freq: str,
+                         cutoff_year: int, stats: Dict) -> pd.DataFrame:
+    name = resampled.columns[0]
+    return unfolded_stats_tables(resampled[[name]], freq, cutoff_year, stats)[name]
+
+
+def broadcast_stats(resampled: pd.DataFrame, table: pd.DataFrame,
+                    freq: str) -> pd.DataFrame:
+    keys = unfold_key(resampled.index, freq)
+    groups = table.index.to_numpy()
+    position = np.minimum(np.searchsorted(groups, keys), max(len(groups) - 1, 0))
+    matched = (groups[position] == keys) if len(groups) else np.zeros(len(keys), bool)
+    rows = table.to_numpy()[position[matched]]
+    frame = resampled[matched]
+    return frame.assign(**{name: rows[:, i] for i, name in enumerate(table.columns)})
+
+
+def compute_seasonal_stats_unfolded(series, interpolation, freq,
+                                    agg, 
+                                    cutoff_year: int = dt.utcnow().year,
+                                    extra_stats=()) -> Tuple[pd.DataFrame, Dict]:
+
+    resampled = resample(series, freq, agg, interpolation)
+
+    stats = unfolded_stats_names(resampled, cutoff_year, extra_stats)
+    table = unfolded_stats_table(resampled, freq, cutoff_year, stats)
+    return broadcast_stats(resampled, table, freq), stats
 
 
 def compute_seasonal_stats(
         frame: pd.DataFrame,
-        cutoff_year: int = dt.utcnow().year) -> Tuple[pd.DataFrame, Dict]:
+        cutoff_year: int = dt.utcnow().year,
+        extra_stats=()) -> Tuple[pd.DataFrame, Dict]:
 
     selected = frame.columns[frame.columns < cutoff_year]
     selected_formated = [dt(year, 1, 1) for year in selected]
@@ -105,5 +222,17 @@ def compute_seasonal_stats(
             'func': lambda x: x[selected].mean(axis=1),
         }
     }
+    for stat in extra_stats:
+        quantile = stat_quantile(stat)
+        if stat == 'std':
+            func = lambda x: x[selected].std(axis=1)
+        elif quantile is not None:
+            func = lambda x, q=quantile: x[selected].quantile(q, axis=1)
+        else:
+            raise ValueError(f'Unknown seasonal statistic: {stat}')
+        stats[stat] = {
+            'name': name_stats(STATS_LABELS.get(stat, stat.upper()), selected_formated),
+            'func': func,
+        }
     _stats = {x['name']: x['func'] for x in stats.values()}
     return frame.assign(**_stats).drop(selected, axis=1), stats
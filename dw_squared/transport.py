@@ -0,0 +1,227 @@
+import json
+import threading
+import time
+from io import StringIO
+from typing import Dict, Iterator
+
+import pandas as pd
+import requests as r
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+import datawrapper
+from datawrapper.exceptions import FailedRequestError, RateLimitError
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+# a POST may have been applied already, only retry what never reached the server
+POST_RETRY_STATUS = (429,)
+CHUNK_ROWS = 5000
+
+
+class NotFoundError(FailedRequestError):
+
+    def __init__(self, response):
+        super().__init__(response)
+        self.status_code = response.status_code
+
+
+class CSVPayload():
+
+    def __init__(self, frame: pd.DataFrame, decimals=None,
+                 chunk_rows: int = CHUNK_ROWS) -> None:
+        self.frame = frame
+        self.decimals = decimals
+        self.chunk_rows = chunk_rows
+        self.date_format = None
+        dates = [frame[x] for x in frame.columns
+                 if pd.api.types.is_datetime64_dtype(frame[x])]
+        if dates:
+            midnight = all((x.dropna() == x.dropna().dt.normalize()).all() for x in dates)
+            self.date_format = '%Y-%m-%d' if midnight else '%Y-%m-%d %H:%M:%S'
+
+    def __iter__(self) -> Iterator[bytes]:
+        for start in range(0, max(len(self.frame), 1), self.chunk_rows):
+            chunk = self.frame.iloc[start:start + self.chunk_rows]
+            if self.decimals is not None:
+                chunk = chunk.round(self.decimals)
+            yield chunk.to_csv(index=False, header=start == 0,
+                               date_format=self.date_format).encode('utf-8')
+
+    def __str__(self) -> str:
+        return b''.join(self).decode('utf-8')
+
+
+class TokenBucket():
+
+    def __init__(self, rate: float = 10., capacity: int = None) -> None:
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity,
+                                   self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def unsent(error: r.RequestException) -> bool:
+    if isinstance(error, r.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, ConnectTimeoutError)
+
+
+class TimeoutAdapter(HTTPAdapter):
+
+    def __init__(self, timeout: float = None, **kwargs) -> None:
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.timeout
+        return super().send(request, timeout=timeout, **kwargs)
+
+
+class Transport():
+
+    def __init__(self,
+                 pool_size: int = 32,
+                 rate: float = 10.,
+                 retries: int = 5,
+                 backoff: float = 0.5,
+                 timeout: float = 30.,
+                 base_url: str = None) -> None:
+        self.retries, self.backoff, self.timeout = retries, backoff, timeout
+        self.base_url = base_url
+        self.limiter = TokenBucket(rate)
+        self.session = r.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def url(self, url: str) -> str:
+        if self.base_url is None:
+            return url
+        return url.replace(datawrapper.Datawrapper._BASE_URL, self.base_url, 1)
+
+    def delay(self, response, attempt: int) -> float:
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after is not None:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff * 2 ** attempt
+
+    def request(self, method: str, url: str, **kwargs) -> r.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        post = method.upper() == 'POST'
+        retry_status = POST_RETRY_STATUS if post else RETRY_STATUS
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            try:
+                response = self.session.request(method, self.url(url), **kwargs)
+            except (r.ConnectionError, r.Timeout) as error:
+                if attempt == self.retries or (post and not unsent(error)):
+                    raise
+                time.sleep(self.delay(None, attempt))
+                continue
+            if response.status_code not in retry_status or attempt == self.retries:
+                return response
+            time.sleep(self.delay(response, attempt))
+        return response
+
+
+TRANSPORT = Transport()
+
+_CLIENTS: Dict[str, 'PooledDatawrapper'] = dict()
+_CLIENTS_LOCK = threading.Lock()
+
+
+def configure_transport(**kwargs) -> Transport:
+    global TRANSPORT
+    TRANSPORT = Transport(**kwargs)
+    with _CLIENTS_LOCK:
+        for client in _CLIENTS.values():
+            client.transport = TRANSPORT
+    return TRANSPORT
+
+
+class PooledDatawrapper(datawrapper.Datawrapper):
+
+    def __init__(self, access_token=None, transport: Transport = None):
+        super().__init__(access_token=access_token)
+        self.transport = transport or TRANSPORT
+
+    def _request(self, method, url, timeout=None, extra_headers=None, **kwargs):
+        headers = self._get_auth_header()
+        headers['accept'] = '*/*'
+        headers.update(extra_headers or {})
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        response = self.transport.request(method, url, headers=headers, **kwargs)
+        if response.ok:
+            return response
+        if response.status_code == 429:
+            raise RateLimitError(response)
+        if response.status_code == 404:
+            raise NotFoundError(response)
+        raise FailedRequestError(response)
+
+    def get(self, url, params=None, timeout=None):
+        response = self._request('GET', url, timeout, params=params)
+        content_type = response.headers.get('content-type', '')
+        if 'json' in content_type:
+            return response.json()
+        if 'text/csv' in content_type:
+            return pd.read_csv(StringIO(response.text))
+        return response.content
+
+    def post(self, url, data=None, timeout=None, extra_headers=None):
+        body = json.dumps(data) if data else None
+        response = self._request('POST', url, timeout, extra_headers, data=body)
+        return response.json() if response.text else True
+
+    def put(self, url, data=None, timeout=None, extra_headers=None, dump_data=True):
+        body = json.dumps(data) if data and dump_data else data
+        self._request('PUT', url, timeout, extra_headers, data=body)
+        return True
+
+    def patch(self, url, data=None, timeout=None, extra_headers=None):
+        headers = {'content-type': 'application/json', **(extra_headers or {})}
+        body = json.dumps(data) if data else None
+        return self._request('PATCH', url, timeout, headers, data=body).json()
+
+    def add_data(self, chart_id, data):
+        if isinstance(data, pd.DataFrame):
+            data = CSVPayload(data)
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return self.put(f'{self._CHARTS_URL}/{chart_id}/data',
+                        data=data,
+                        extra_headers={'content-type': 'text/csv'},
+                        dump_data=False)
+
+    def delete(self, url, timeout=None, data=None, extra_headers=None):
+        kwargs = {'json': data} if data else {}
+        self._request('DELETE', url, timeout, extra_headers, **kwargs)
+        return True
+
+
+def shared_client(token: str) -> PooledDatawrapper:
+    with _CLIENTS_LOCK:
+        if token not in _CLIENTS:
+            _CLIENTS[token] = PooledDatawrapper(access_token=token)
+        return _CLIENTS[token]
@@ -17,6 +17,9 @@ setup(
         'dw_squared': 'dw_squared',
     },
     install_requires=REQUIREMENTS,
+    extras_require={
+        'cache': ['pyarrow'],
+    },
     entry_points={
         'console_scripts': [
             'dw=dw_squared.cli:view',
@@ -1,5 +1,125 @@
+from types import SimpleNamespace
+from itertools import count
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from dw_squared import nest_patch
+from dw_squared.transport import NotFoundError
+
 
 def pytest_addoption(parser):
     parser.addoption("--mapping", action="store", default="default name")
     parser.addoption("--endpoint", action="store", default="default name")
-    parser.addoption("--token", action="store", default="default name")
\ No newline at end of file
+    parser.addoption("--token", action="store", default="default name")
+
+
+class FakeTimeseries():
+
+    def __init__(self, start='2015-1-1', end='2024-12-31', freq='D'):
+        self.index = pd.date_range(start=start, end=end, freq=freq)
+        self.idates = [pd.Timestamp(2021, 1, 1)]
+        self.inserts = dict()
+        self.calls = []
+
+    def insert(self, name, diff, idate):
+        self.inserts.setdefault(name, []).append((idate, diff))
+        self.idates.append(idate)
+
+    def insertion_dates(self, name, from_insertion_date=None,
+                        to_insertion_date=None, **kwargs):
+        return [x for x in self.idates
+                if (from_insertion_date is None or x >= from_insertion_date)
+                and (to_insertion_date is None or x <= to_insertion_date)]
+
+    def get(self, name, revision_date=None,
+            from_value_date=None, to_value_date=None, **kwargs):
+        self.calls.append((name, revision_date, from_value_date, to_value_date))
+        values = np.arange(len(self.index), dtype=float) + len(name)
+        serie = pd.Series(values, index=self.index, name=name)
+        for idate, diff in self.inserts.get(name, []):
+            if revision_date is None or idate <= revision_date:
+                serie = diff.combine_first(serie)
+        return serie[from_value_date:to_value_date]
+
+    def history(self, name, from_insertion_date=None, from_value_date=None,
+                to_value_date=None, diffmode=False, **kwargs):
+        self.calls.append((name, from_insertion_date, from_value_date, to_value_date))
+        return {idate: diff[from_value_date:to_value_date]
+                for idate, diff in self.inserts.get(name, [])
+                if from_insertion_date is None or idate >= from_insertion_date}
+
+
+class FakeDatawrapper():
+    _CHARTS_URL = 'charts'
+
+    def __init__(self):
+        self.charts = dict()
+        self.calls = []
+        self._ids = count()
+
+    def add_charts(self, n_charts):
+        for i in range(n_charts):
+            self.charts[f'id{i}'] = {'id': f'id{i}', 'title': f'chart {i}',
+                                     'metadata': {}}
+        return self
+
+    def get(self, url, params):
+        self.calls.append(('get', None))
+        offset, limit = params['offset'], params['limit']
+        charts = list(self.charts.values())
+        return {'list': charts[offset:offset + limit], 'total': len(charts)}
+
+    def _chart(self, chart_id):
+        if chart_id not in self.charts:
+            raise NotFoundError(SimpleNamespace(status_code=404, content=b''))
+        return self.charts[chart_id]
+
+    def chart_properties(self, chart_id):
+        self.calls.append(('chart_properties', chart_id))
+        return self._chart(chart_id)
+
+    def create_chart(self, title, chart_type, data=None, **kwargs):
+        chart_id = f'new{next(self._ids)}'
+        self.calls.append(('create_chart', chart_id))
+        self.charts[chart_id] = {'id': chart_id, 'title': title,
+                                 'type': chart_type, 'metadata': {}}
+        return self.charts[chart_id]
+
+    def add_data(self, chart_id, data):
+        self.calls.append(('add_data', chart_id))
+        self._chart(chart_id)['data'] = data
+        return True
+
+    def update_description(self, chart_id, source_name=None, **kwargs):
+        self.calls.append(('update_description', chart_id))
+        describe = {'source-name': source_name}
+        self.charts[chart_id]['metadata'].setdefault('describe', {}).update(describe)
+        return self.charts[chart_id]
+
+    def update_metadata(self, chart_id, metadata):
+        self.calls.append(('update_metadata', chart_id))
+        self.charts[chart_id]['sent'] = metadata
+        nest_patch(self.charts[chart_id]['metadata'], metadata)
+        return self.charts[chart_id]
+
+    def publish_chart(self, chart_id, display=False):
+        self.calls.append(('publish_chart', chart_id))
+        return self.charts[chart_id]
+
+    def delete_chart(self, chart_id):
+        self.calls.append(('delete_chart', chart_id))
+        self._chart(chart_id)
+        del self.charts[chart_id]
+        return True
+
+
+@pytest.fixture
+def fake_dw():
+    return FakeDatawrapper()
+
+
+@pytest.fixture
+def fake_tsa():
+    return FakeTimeseries()
@@ -0,0 +1,40 @@
+import pytest
+import pandas as pd
+
+from dw_squared.cache import SeriesCache
+
+pytest.importorskip('pyarrow')
+
+
+def test_cache_hit(fake_tsa, tmp_path):
+    cache = SeriesCache(str(tmp_path))
+    start, end = pd.Timestamp(2020, 1, 1), pd.Timestamp(2020, 12, 31)
+    first = cache.get(fake_tsa, 'a', from_value_date=start, to_value_date=end)
+    second = SeriesCache(str(tmp_path)).get(fake_tsa, 'a', from_value_date=start,
+                                            to_value_date=end)
+    assert len(fake_tsa.calls) == 1
+    pd.testing.assert_series_equal(first, second, check_freq=False)
+
+
+def test_cache_fetches_missing_tail(fake_tsa, tmp_path):
+    cache = SeriesCache(str(tmp_path))
+    start = pd.Timestamp(2020, 1, 1)
+    cache.get(fake_tsa, 'a', from_value_date=start, to_value_date=pd.Timestamp(2020, 12, 31))
+    serie = cache.get(fake_tsa, 'a', from_value_date=start)
+    assert fake_tsa.calls[-1][2] == pd.Timestamp(2020, 12, 31)
+    expected = fake_tsa.get('a', from_value_date=start)
+    pd.testing.assert_series_equal(serie, expected, check_freq=False)
+
+
+def test_cache_invalidation(fake_tsa, tmp_path):
+    cache = SeriesCache(str(tmp_path))
+    start, end = pd.Timestamp(2020, 1, 1), pd.Timestamp(2020, 12, 31)
+    cache.get(fake_tsa, 'a', from_value_date=start, to_value_date=end)
+    fake_tsa.idates.append(pd.Timestamp(2022, 1, 1))
+    cache.get(fake_tsa, 'a', from_value_date=start, to_value_date=end)
+    assert len(fake_tsa.calls) == 2
+    pinned = pd.Timestamp(2021, 6, 1)
+    cache.get(fake_tsa, 'a', revision_date=pinned, from_value_date=start, to_value_date=end)
+    fake_tsa.idates.append(pd.Timestamp(2023, 1, 1))
+    cache.get(fake_tsa, 'a', revision_date=pinned, from_value_date=start, to_value_date=end)
+    assert len(fake_tsa.calls) == 3
@@ -1,4 +1,6 @@
+from collections import Counter
 import pytest
+import pandas as pd
 from tshistory.api import timeseries
 
 from dw_squared.client import (PlotConfig, TableConfig, create_single_plot,
@@ -25,6 +27,19 @@ def test_plot_config():
     assert len(plotconfig.config) == 2
 
 
+def test_single_config_is_side_effect_free():
+    plotconfig = PlotConfig('tests/mapping.yaml')
+    first = plotconfig.single_config('line_plot')
+    first['title'] = 'changed'
+    assert plotconfig.single_config('line_plot')['title'] == 'line_plot'
+    assert 'series' not in plotconfig.single_config('line_plot')
+    assert plotconfig.order_series('line_plot') == ['legend', 'legend']
+    assert len(plotconfig.config[1]['series']) == 2
+    queries = plotconfig.series_queries(['seasonal_plot'])
+    assert list(queries.index.get_level_values(0)) == ['seasonal_plot']
+    assert TableConfig('tests/mapping.yaml').series_queries(['line_plot']).empty
+
+
 def test_plot(token, endpoint, mapping):
     plotconfig = PlotConfig(mapping)
     title = plotconfig.config[0]['title']
@@ -42,3 +57,333 @@ def test_table(token, endpoint, mapping):
     data = get_data(tsa, program)
     data = saturn_to_frame(data, tableconfig, title)
     create_single_table(data, tableconfig, title, token)
+
+
+def test_publish_all(fake_tsa, monkeypatch):
+    import dw_squared.client as client
+    published = {}
+
+    def fake_publish(data, config, title, token, **kwargs):
+        published[title] = data
+        return {'id': title}
+
+    monkeypatch.setattr(client, 'create_single_plot', fake_publish)
+    plotconfig = PlotConfig('tests/mapping.yaml')
+    result = client.publish_all(plotconfig, fake_tsa, 'token', max_workers=2)
+    assert result == {'seasonal_plot': {'id': 'seasonal_plot'},
+                      'line_plot': {'id': 'line_plot'}}
+    # the 2021-1-1 revision and the latest one are the same insertion
+    assert len(fake_tsa.calls) == 2
+    assert published['seasonal_plot'].shape[1] == 1
+    assert published['line_plot'].index[0] == pd.Timestamp(2021, 1, 1)
+
+
+def test_publish_all_reports_failed_series(fake_tsa, monkeypatch):
+    import dw_squared.client as client
+    monkeypatch.setattr(client, 'create_single_plot',
+                        lambda data, config, title, token, **kwargs: {'id': title})
+    get = fake_tsa.get
+
+    def missing(name, **kwargs):
+        if name == 'series_id_2':
+            raise ValueError('unavailable')
+        return get(name, **kwargs)
+
+    monkeypatch.setattr(fake_tsa, 'get', missing)
+    plotconfig = PlotConfig('tests/mapping.yaml')
+    result = client.publish_all(plotconfig, fake_tsa, 'token', backoff=0,
+                                return_exceptions=True)
+    assert result['seasonal_plot'] == {'id': 'seasonal_plot'}
+    assert isinstance(result['line_plot'], ValueError)
+    with pytest.raises(ValueError, match='unavailable'):
+        client.publish_all(plotconfig, fake_tsa, 'token', backoff=0)
+
+
+def test_refresh_single_plot(fake_tsa, fake_dw, monkeypatch, tmp_path):
+    import dw_squared.client as client
+    from dw_squared.index import ChartIndex
+    index = ChartIndex(fake_dw)
+    monkeypatch.setattr('dw_squared.plot.shared_client', lambda token: fake_dw)
+    monkeypatch.setattr('dw_squared.plot.shared_index', lambda token: index)
+    mapping = tmp_path / 'mapping.yaml'
+    mapping.write_text("""
+- chart_type: "line"
+  title: "line_plot"
+  series:
+    - {series_id: "a", legend: "a", start: (date "2024-1-1"), end: null, revision: null}
+    - {series_id: "b", legend: "b", start: (date "2024-1-1"), end: null, revision: null}
+""")
+    plotconfig = PlotConfig(str(mapping))
+    plots = dict()
+    client.refresh_single_plot(fake_tsa, plotconfig, 'line_plot', 'token', plots)
+    chart_id = index['line_plot']
+    fake_tsa.calls.clear()
+    assert client.refresh_single_plot(
+        fake_tsa, plotconfig, 'line_plot', 'token', plots) is None
+
+    tail = pd.Series([1., 2.], index=pd.date_range('2025-1-1', periods=2))
+    fake_tsa.insert('a', tail, pd.Timestamp(2025, 1, 2))
+    client.refresh_single_plot(fake_tsa, plotconfig, 'line_plot', 'token', plots)
+    assert [call[0] for call in fake_tsa.calls] == ['a', 'b'] * 2
+    plot = plots['line_plot']
+    assert plot.refreshed_at == pd.Timestamp(2025, 1, 2)
+    assert plot.frame.loc['2025-1-2', 'a'] == 2.
+    assert plot._data.iloc[-1]['index'] == pd.Timestamp(2025, 1, 2)
+    assert fake_dw.calls[-1] == ('publish_chart', chart_id)
+    assert index['line_plot'] == chart_id
+
+
+def test_table_config_fetches_leaves(tmp_path):
+    mapping = tmp_path / 'mapping.yaml'
+    mapping.write_text("""
+- chart_type: "table"
+  title: "balance"
+  freq_table: "M"
+  L1:
+    - legend: "total"
+      aggregation_level: "sum"
+      L2:
+        - {legend: "a", series_id: "a"}
+        - {legend: "b", series_id: "b"}
+    - {legend: "c", series_id: "c"}
+""")
+    tableconfig = TableConfig(str(mapping))
+    queries = tableconfig.series_queries(['balance'])
+    assert list(queries['series_id']) == ['a', 'b', 'c']
+    assert tableconfig.order_series('balance') == ['total', 'a', 'b', 'c']
+
+
+def test_saturn_to_frame(tmp_path):
+    mapping = tmp_path / 'mapping.yaml'
+    mapping.write_text("""
+- chart_type: "line"
+  title: "line_plot"
+  series:
+    - {series_id: "a", legend: "a", start: (date "2024-1-3"), end: null, revision: null}
+    - {series_id: "a", legend: "a early", start: null, end: (date "2024-1-2"), revision: null}
+    - {series_id: "b", legend: "b", start: null, end: null, revision: null}
+""")
+    plotconfig = PlotConfig(str(mapping))
+    index = pd.date_range('2024-1-1', periods=5, freq='D')
+    data = {('a', float('nan')): pd.Series(range(5), index=index, dtype=float),
+            ('b', None): pd.Series([1., 2.], index=index[[1, 4]]),
+            ('c', None): pd.Series([1.], index=index[:1])}
+    frame = saturn_to_frame(data, plotconfig, 'line_plot')
+    assert list(frame.columns) == ['a', 'a early', 'b']
+    assert list(frame.index) == list(index)
+    assert frame['a'].tolist()[2:] == [2., 3., 4.]
+    assert frame['a early'].dropna().tolist() == [0., 1.]
+    assert frame['b'].dropna().tolist() == [1., 2.]
+
+
+def test_publish_pipeline(fake_tsa, fake_dw, monkeypatch):
+    import dw_squared.client as client
+    from dw_squared.index import ChartIndex
+    index = ChartIndex(fake_dw)
+    monkeypatch.setattr('dw_squared.plot.shared_client', lambda token: fake_dw)
+    monkeypatch.setattr('dw_squared.plot.shared_index', lambda token: index)
+    plotconfig = PlotConfig('tests/mapping.yaml')
+    result = client.publish_pipeline(plotconfig, fake_tsa, 'token', fetch_workers=2,
+                                     reshape_workers=1, publish_workers=1, queue_size=1)
+    assert list(result) == ['seasonal_plot', 'line_plot']
+    assert {x['title'] for x in result.values()} == {'seasonal_plot', 'line_plot'}
+    # the 2021-1-1 revision and the latest one are the same insertion
+    assert len(fake_tsa.calls) == 2
+
+    def broken(*args, **kwargs):
+        raise ValueError('unavailable')
+
+    get, calls = fake_tsa.get, Counter()
+
+    def flaky(name, **kwargs):
+        calls[name] += 1
+        if calls[name] == 1:
+            raise ConnectionError(name)
+        return get(name, **kwargs)
+
+    monkeypatch.setattr(fake_tsa, 'get', flaky)
+    result = client.publish_pipeline(plotconfig, fake_tsa, 'token', backoff=0)
+    assert all(isinstance(x, dict) for x in result.values())
+
+    monkeypatch.setattr(fake_tsa, 'get', broken)
+    result = client.publish_pipeline(plotconfig, fake_tsa, 'token', backoff=0,
+                                     return_exceptions=True)
+    assert all(isinstance(x, ValueError) for x in result.values())
+    with pytest.raises(ValueError):
+        client.publish_pipeline(plotconfig, fake_tsa, 'token', backoff=0)
+
+
+def test_publish_pipeline_saves_state_once(fake_tsa, fake_dw, monkeypatch, tmp_path):
+    import dw_squared.client as client
+    from dw_squared.index import ChartIndex
+    from dw_squared.state import FingerprintStore
+    index = ChartIndex(fake_dw)
+    monkeypatch.setattr('dw_squared.plot.shared_client', lambda token: fake_dw)
+    monkeypatch.setattr('dw_squared.plot.shared_index', lambda token: index)
+    saves = Counter()
+    save = FingerprintStore.save
+
+    def counted(self):
+        saves['save'] += 1
+        save(self)
+
+    monkeypatch.setattr(FingerprintStore, 'save', counted)
+    path = str(tmp_path / 'state.json')
+    plotconfig = PlotConfig('tests/mapping.yaml')
+    client.publish_pipeline(plotconfig, fake_tsa, 'token', upsert=True, state_path=path)
+    assert saves['save'] == 1
+    stored = FingerprintStore(path)
+    assert all(stored.get(index[x]) for x in plotconfig.titles)
+
+
+def test_publish_pipeline_processes(fake_tsa, fake_dw, monkeypatch):
+    import dw_squared.client as client
+    from dw_squared.index import ChartIndex
+    sent = {}
+    create_chart = fake_dw.create_chart
+
+    def recording(title, chart_type, data=None, **kwargs):
+        sent[title] = (chart_type, str(data))
+        return create_chart(title, chart_type, data=data, **kwargs)
+
+    monkeypatch.setattr(fake_dw, 'create_chart', recording)
+    monkeypatch.setattr('dw_squared.plot.shared_client', lambda token: fake_dw)
+    plotconfig = PlotConfig('tests/mapping.yaml')
+    published = []
+    for processes in (None, 2):
+        index = ChartIndex(fake_dw)
+        monkeypatch.setattr('dw_squared.plot.shared_index', lambda token: index)
+        result = client.publish_pipeline(plotconfig, fake_tsa, 'token',
+                                         processes=processes)
+        assert list(result) == ['seasonal_plot', 'line_plot']
+        published.append((dict(sent), {x['title']: x['metadata'] for x in result.values()}))
+    assert published[0] == published[1]
+
+
+def test_get_data_reports_failures(fake_tsa, monkeypatch):
+    get, attempts = fake_tsa.get, Counter()
+
+    def flaky(name, **kwargs):
+        attempts[name] += 1
+        if name == 'broken' or (name == 'flaky' and attempts[name] == 1):
+            raise ConnectionError(name)
+        return get(name, **kwargs)
+
+    monkeypatch.setattr(fake_tsa, 'get', flaky)
+    start = pd.Timestamp('2020-1-1')
+    queries = {(name, None): {'start': start, 'end': None}
+               for name in ('a', 'flaky', 'broken')}
+    data = get_data(fake_tsa, queries, retries=1, backoff=0)
+    assert list(data) == list(queries)
+    assert data[('flaky', None)] is not None
+    assert data[('broken', None)] is None
+    assert list(data.errors) == [('broken', None)]
+    assert attempts == {'a': 1, 'flaky': 2, 'broken': 2}
+
+
+def test_get_data_batches_groups(fake_tsa):
+    batches = []
+
+    def batch(tsa, names, revision_date=None, from_value_date=None, to_value_date=None):
+        batches.append((tuple(names), revision_date, from_value_date))
+        return {name: tsa.get(name, revision_date=revision_date,
+                              from_value_date=from_value_date,
+                              to_value_date=to_value_date)
+                for name in names if name != 'missing'}
+
+    first, second = pd.Timestamp('2020-1-1'), pd.Timestamp('2021-1-1')
+    queries = {('a', None): {'start': first, 'end': None},
+               ('b', None): {'start': first, 'end': None},
+               ('c', None): {'start': second, 'end': None},
+               ('missing', None): {'start': second, 'end': None}}
+    data = get_data(fake_tsa, queries, batch=batch)
+    assert sorted(batches) == [(('a', 'b'), None, first), (('c', 'missing'), None, second)]
+    assert data[('c', None)].index[0] == second
+    assert data[('missing', None)] is None
+    assert list(data.errors) == [('missing', None)]
+
+
+def test_pool_connections():
+    import requests
+    from types import SimpleNamespace
+    from dw_squared.client import pool_connections
+    tsa = SimpleNamespace(session=requests.Session())
+    pool_connections(tsa, 16, timeout=5)
+    adapter = tsa.session.get_adapter('https://tshistory')
+    assert (adapter._pool_maxsize, adapter.timeout) == (16, 5)
+    pool_connections(tsa, 16, timeout=10)
+    assert tsa.session.get_adapter('https://tshistory') is adapter
+    assert adapter.timeout == 10
+
+
+def test_get_data_collapses_revisions(fake_tsa):
+    for day in (1, 15):
+        fake_tsa.insert('a', pd.Series([float(day)], index=[pd.Timestamp(2022, 1, day)]),
+                        pd.Timestamp(2022, 1, day))
+    bounds = {'start': pd.Timestamp('2021-12-1'), 'end': None}
+    queries = {('a', pd.Timestamp(2022, 1, x)): bounds for x in (2, 8, 16, 20)}
+    queries[('a', None)] = {'start': pd.Timestamp('2022-1-1'), 'end': None}
+    queries[('b', pd.Timestamp(2022, 1, 20))] = bounds
+    listed = []
+    insertion_dates = fake_tsa.insertion_dates
+
+    def listing(name, **kwargs):
+        listed.append(name)
+        return insertion_dates(name, **kwargs)
+
+    fake_tsa.insertion_dates = listing
+    data = get_data(fake_tsa, queries)
+    assert listed == ['a']
+    assert sorted(str(x[1]) for x in fake_tsa.calls) == [
+        '2022-01-01 00:00:00', '2022-01-15 00:00:00', '2022-01-20 00:00:00']
+    fake_tsa.calls.clear()
+    expected = get_data(fake_tsa, queries, resolve=False)
+    assert len(fake_tsa.calls) == len(queries)
+    for key in queries:
+        pd.testing.assert_series_equal(data[key], expected[key])
+
+
+def test_config_starts_a_run(tmp_path, monkeypatch):
+    import dw_squared.moments as moments
+    from datetime import datetime as dt
+    mapping = tmp_path / 'mapping.yaml'
+    mapping.write_text(
+        '- chart_type: line\n'
+        '  title: today\n'
+        '  series:\n'
+        '    - {series_id: a, legend: a, start: (today), end: null, revision: null}\n')
+    config = PlotConfig(str(mapping))
+    first = config.series_bounds(['today']).popitem()[1]['start']
+
+    class Tomorrow(dt):
+        @classmethod
+        def now(cls):
+            return dt.now() + pd.Timedelta(days=1)
+
+    monkeypatch.setattr(moments, 'datetime', Tomorrow)
+    second = PlotConfig(str(mapping)).series_bounds(['today']).popitem()[1]['start']
+    assert second == first + pd.Timedelta(days=1)
+    assert config.moments.today == first
+    assert config.moments.evaluate('(today)') == first
+
+
+def test_submit_chart_does_not_wait():
+    from concurrent.futures import Future
+    from multiprocessing.shared_memory import SharedMemory
+    from dw_squared.client import submit_chart
+    submitted = []
+
+    class Pending():
+        def submit(self, func, spec, kwargs):
+            submitted.append(spec)
+            return Future()
+
+    plotconfig = PlotConfig('tests/mapping.yaml')
+    frame = pd.DataFrame({'legend': [1., 2.]},
+                         index=pd.date_range('2021-1-1', periods=2))
+    future = submit_chart(Pending(), frame, plotconfig, 'line_plot', 'token')
+    assert not future.done()
+    SharedMemory(name=submitted[0]['name']).close()
+    future.set_result({})
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=submitted[0]['name'])
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dw_squared.downsample import downsample, lttb, minmax
+from dw_squared.line import Lines
+
+
+def test_lttb_keeps_extremes():
+    x = np.arange(10000, dtype=float)
+    y = np.sin(x / 500)
+    y[4321] = 10
+    selected = lttb(x, y, 200)
+    assert len(selected) == 200
+    assert selected[0] == 0 and selected[-1] == 9999
+    assert 4321 in selected
+    assert (np.diff(selected) > 0).all()
+
+
+def test_minmax_keeps_extremes():
+    x = np.arange(10000, dtype=float)
+    y = np.random.randn(10000)
+    selected = minmax(x, y, 100)
+    assert len(selected) <= 100
+    assert y.argmin() in selected and y.argmax() in selected
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+def test_downsample_frame(method):
+    index = pd.date_range('2015-1-1', periods=50000, freq='h')
+    data = pd.DataFrame({'index': index,
+                         'a': np.cumsum(np.random.randn(len(index))),
+                         'b': np.cumsum(np.random.randn(len(index)))})
+    keep = [index[1234]]
+    sampled = downsample(data, 1000, method, keep)
+    assert len(sampled) <= 1000 + len(keep) + 2
+    assert sampled['index'].iloc[-1] == index[-1]
+    assert index[1234] in set(sampled['index'])
+    assert downsample(data, None) is data
+
+
+def test_lines_downsampling_keeps_anchors():
+    index = pd.date_range('2015-1-1', periods=20000, freq='h')
+    data = pd.DataFrame({'a': np.cumsum(np.random.randn(len(index))),
+                         'b': np.cumsum(np.random.randn(len(index)))}, index=index)
+    full = Lines(data=data, title='full', token='token', secondary=True)
+    small = Lines(data=data, title='small', token='token', secondary=True,
+                  max_points=500)
+    assert len(small._data) < 510
+    assert small._data['index'].iloc[-1] == index[-1]
+    annotations = lambda x: x.compute_metadata()['visualize']['text-annotations']
+    assert annotations(small) == annotations(full)
@@ -0,0 +1,45 @@
+import json
+
+from dw_squared import index as index_module
+from dw_squared.index import ChartIndex, shared_index
+
+
+def test_index_lists_once(fake_dw):
+    dw = fake_dw.add_charts(250)
+    index = ChartIndex(dw)
+    assert index['chart 0'] == 'id0'
+    assert index.get('chart 249') == 'id249'
+    assert index.get('missing') is None
+    assert len(dw.calls) == 3
+
+
+def test_index_updates(fake_dw, tmp_path):
+    path = str(tmp_path / 'index.json')
+    dw = fake_dw.add_charts(3)
+    index = ChartIndex(dw, path)
+    index.add('new chart', 'new')
+    index.discard('chart 0')
+    with open(path) as stream:
+        assert json.load(stream) == {'chart 1': 'id1', 'chart 2': 'id2',
+                                     'new chart': 'new'}
+    reloaded = ChartIndex(dw, path)
+    assert 'new chart' in reloaded
+    assert len(dw.calls) == 1
+
+
+def test_shared_index_merges_new_path(fake_dw, tmp_path, monkeypatch):
+    dw = fake_dw.add_charts(2)
+    monkeypatch.setattr(index_module, '_SHARED', dict())
+    monkeypatch.setattr(index_module, 'shared_client', lambda token: dw)
+    first = str(tmp_path / 'first.json')
+    second = str(tmp_path / 'second.json')
+    with open(second, 'w') as stream:
+        json.dump({'stored chart': 'stored'}, stream)
+    index = shared_index('token', first)
+    index.add('new chart', 'new')
+    assert shared_index('token', second) is index
+    assert index['stored chart'] == 'stored'
+    assert index['new chart'] == 'new'
+    with open(second) as stream:
+        assert json.load(stream) == {'chart 0': 'id0', 'chart 1': 'id1',
+                                     'new chart': 'new', 'stored chart': 'stored'}
@@ -1,4 +1,4 @@
-from dw_squared.moments import evaluate_not_none
+from dw_squared.moments import Moments, evaluate_not_none
 import pandas as pd
 from datetime import datetime as dt
 
@@ -9,4 +9,20 @@ def test_date():
     assert evaluate_not_none(expr) == pd.to_datetime(dt(2021, 12, 31))
     expr = '(deltadays (date "2021-5-1") 4)'
     assert evaluate_not_none(expr) == pd.to_datetime(dt(2021, 5, 5))
-    
\ No newline at end of file
+    
+
+def test_today_snapshot(monkeypatch):
+    import dw_squared.moments as moments
+    run = Moments()
+    first = run.evaluate('(today)')
+    assert run.evaluate('(deltadays (today) 1)') == first + pd.Timedelta(days=1)
+
+    class Tomorrow(dt):
+        @classmethod
+        def now(cls):
+            return dt.now() + pd.Timedelta(days=1)
+
+    monkeypatch.setattr(moments, 'datetime', Tomorrow)
+    assert run.evaluate('(today)') == first
+    assert evaluate_not_none('(today)', run) == first
+    assert Moments().evaluate('(today)') == first + pd.Timedelta(days=1)
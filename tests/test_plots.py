@@ -1,4 +1,5 @@
 from os import nice
+import asyncio
 import pytest
 from datetime import datetime as dt
 
@@ -10,6 +11,8 @@ from dw_squared.seasonal import Seasonal
 from dw_squared.line import Lines
 from dw_squared.area import Area
 from dw_squared.bar import StackedBar
+from dw_squared.index import ChartIndex
+from dw_squared.state import FingerprintStore
 
 
 @pytest.fixture
@@ -106,3 +109,122 @@ def test_stacked_bar(token):
     published = plot.get_charts(
         search='test_stacked', published=True)
     assert published[0]['id'] == plot._chart['id']
+
+
+def test_upsert(fake_dw):
+    range_date = pd.date_range(
+        start=dt(2019, 1, 1), end=dt(2021, 9, 30), freq='D')
+    data = pd.DataFrame(np.ones((len(range_date), 2)),
+                        index=range_date, columns=['a', 'b'])
+
+    def lines():
+        plot = Lines(data=data, title='test_upsert', token='token',
+                     source='me', display_today=False)
+        plot.dw, plot.index = fake_dw, ChartIndex(fake_dw)
+        return plot
+
+    lines().publish(upsert=True)
+    chart_id = lines().index['test_upsert']
+    fake_dw.calls.clear()
+    lines().publish(upsert=True)
+    assert [call for call, _ in fake_dw.calls] == [
+        'get', 'chart_properties', 'add_data', 'publish_chart']
+    assert lines().index['test_upsert'] == chart_id
+
+
+def test_deleted_chart_is_recreated(fake_dw):
+    range_date = pd.date_range(
+        start=dt(2019, 1, 1), end=dt(2021, 9, 30), freq='W')
+    data = pd.DataFrame(np.ones((len(range_date), 2)),
+                        index=range_date, columns=['a', 'b'])
+    index = ChartIndex(fake_dw)
+
+    def area():
+        plot = Area(data=data, title='test_deleted', token='token',
+                    display_today=False)
+        plot.dw, plot.index = fake_dw, index
+        return plot
+
+    area().publish(upsert=True)
+    del fake_dw.charts[index['test_deleted']]
+    area().publish(upsert=True)
+    assert index['test_deleted'] in fake_dw.charts
+    del fake_dw.charts[index['test_deleted']]
+    area().update_data(data * 2)
+    assert index['test_deleted'] in fake_dw.charts
+    assert fake_dw.charts[index['test_deleted']]['title'] == 'test_deleted'
+    del fake_dw.charts[index['test_deleted']]
+    area().publish()
+    assert list(fake_dw.charts) == [index['test_deleted']]
+
+
+def test_skip_unchanged(fake_dw, tmp_path):
+    range_date = pd.date_range(
+        start=dt(2019, 1, 1), end=dt(2021, 9, 30), freq='W')
+    data = pd.DataFrame(np.ones((len(range_date), 2)),
+                        index=range_date, columns=['a', 'b'])
+    state = FingerprintStore(str(tmp_path / 'state.json'))
+
+    def area(frame):
+        plot = Area(data=frame, title='test_skip', token='token',
+                    display_today=False)
+        plot.dw, plot.index = fake_dw, ChartIndex(fake_dw)
+        return plot
+
+    assert area(data).publish(state=state) is not None
+    fake_dw.calls.clear()
+    assert area(data).publish(state=state) is None
+    assert area(data).update_data(data, state=state) is None
+    assert 'add_data' not in [call for call, _ in fake_dw.calls]
+    assert area(data).update_data(data * 2, state=state) is not None
+
+
+def test_apublish_many(fake_dw):
+    from dw_squared.client import apublish_many
+    range_date = pd.date_range(
+        start=dt(2019, 1, 1), end=dt(2021, 9, 30), freq='Q')
+    data = pd.DataFrame(np.ones((len(range_date), 2)),
+                        index=range_date, columns=['a', 'b'])
+    index = ChartIndex(fake_dw)
+    plots = []
+    for i in range(5):
+        plot = StackedBar(data=data, title=f'test_async_{i}', token='token')
+        plot.dw, plot.index = fake_dw, index
+        plots.append(plot)
+    published = asyncio.run(apublish_many(plots, concurrency=2))
+    assert [x['title'] for x in published] == [f'test_async_{i}' for i in range(5)]
+    assert len(fake_dw.charts) == 5
+
+
+@pytest.mark.parametrize('unfold', [True, False])
+@pytest.mark.parametrize('freq', ['D', 'W'])
+def test_seasonal_append(unfold, freq):
+    year = dt.utcnow().year
+    range_date = pd.date_range(
+        start=dt(2001, 1, 1), end=dt(year, 9, 30), freq='D')
+    data = pd.DataFrame(np.cumsum(np.random.randn(len(range_date))),
+                        index=range_date, columns=['serie'])
+    kwargs = dict(title='test_seasonal_append', token='token', freq_graph=freq,
+                  interpolation='linear', unfold=unfold, cutoff_year=year - 1)
+    full = Seasonal(data=data, **kwargs)
+    incremental = Seasonal(data=data.loc[:f'{year}-9-10'], **kwargs)
+    incremental.append(data.loc[f'{year}-9-11':])
+    pd.testing.assert_frame_equal(full._data_stats, incremental._data_stats,
+                                  check_freq=False)
+
+
+@pytest.mark.parametrize('unfold', [True, False])
+def test_seasonal_batch(unfold):
+    range_date = pd.date_range(start=dt(2015, 1, 1), end=dt(2020, 6, 30), freq='D')
+    data = pd.DataFrame(np.cumsum(np.random.randn(len(range_date), 3), axis=0),
+                        index=range_date, columns=['a', 'b', 'c'])
+    data.loc[:'2016', 'c'] = np.nan
+    kwargs = dict(token='token', freq_graph='W', interpolation='linear',
+                  unfold=unfold, cutoff_year=2019, extra_stats=['p10', 'p90'])
+    plots = Seasonal.batch(data, title='desk', **kwargs)
+    assert [x.title for x in plots.values()] == ['desk a', 'desk b', 'desk c']
+    for name, plot in plots.items():
+        single = Seasonal(data=data[[name]], title=f'desk {name}', **kwargs)
+        pd.testing.assert_frame_equal(plot._data_stats, single._data_stats)
+        assert ([x['name'] for x in plot.columns_definition.values()] ==
+                [x['name'] for x in single.columns_definition.values()])
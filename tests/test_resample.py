@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from dw_squared.resample import ResampleCache
+
+
+def frame():
+    index = pd.date_range('2018-1-1', '2020-12-31', freq='D')
+    data = pd.DataFrame(np.random.randn(len(index), 2), index=index,
+                        columns=['a', 'b'])
+    data.iloc[::5, 1] = np.nan
+    return data
+
+
+def test_resample_cache_hits():
+    cache = ResampleCache()
+    data = frame()
+    expected = data.resample('W').agg({'a': 'sum', 'b': 'last'}).interpolate(method='linear')
+    first = cache.resample(data, 'W', {'a': 'sum', 'b': 'last'}, 'linear')
+    pd.testing.assert_frame_equal(first, expected)
+    assert (cache.hits, cache.misses) == (0, 2)
+    first.iloc[0, 0] = 1e6
+    pd.testing.assert_frame_equal(cache.resample(data, 'W', {'a': 'sum', 'b': 'last'}, 'linear'),
+                                  expected)
+    assert cache.hits == 2
+    cache.resample(data[['b', 'a']], 'W', {'a': 'sum', 'b': 'mean'}, 'linear')
+    assert (cache.hits, cache.misses) == (3, 3)
+
+
+def test_resample_cache_memory_cap():
+    data = frame()
+    column_size = data['a'].resample('W').sum().memory_usage(index=True)
+    cache = ResampleCache(max_bytes=int(column_size * 3.5))
+    for freq in ('W', 'W-WED', 'W-FRI'):
+        cache.resample(data, freq, 'sum')
+    assert cache.size <= cache.max_bytes
+    assert len(cache._entries) == 3
+    cache.resample(data[['a']], 'W', 'sum')
+    assert cache.misses == 7
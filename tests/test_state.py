@@ -0,0 +1,34 @@
+import os
+
+import pandas as pd
+
+from dw_squared.state import FingerprintStore, fingerprint
+
+
+def test_fingerprint():
+    data = pd.DataFrame({'a': [1., 2.], 'b': [3., 4.]})
+    metadata = {'visualize': {'y-grid': 'on'}}
+    assert fingerprint(data, metadata) == fingerprint(data.copy(), dict(metadata))
+    assert fingerprint(data, metadata) != fingerprint(data.rename(columns={'a': 'c'}), metadata)
+    assert fingerprint(data, metadata) != fingerprint(data * 2, metadata)
+    assert fingerprint(data, metadata) != fingerprint(data, {})
+
+
+def test_store(tmp_path):
+    path = str(tmp_path / 'state.json')
+    store = FingerprintStore(path)
+    store.set('id', 'abc')
+    assert store.unchanged('id', 'abc')
+    assert not store.unchanged('id', 'def')
+    assert not store.unchanged(None, 'abc')
+    assert FingerprintStore(path).get('id') == 'abc'
+
+
+def test_store_saves_on_demand(tmp_path):
+    path = str(tmp_path / 'state.json')
+    store = FingerprintStore(path, autosave=False)
+    store.set('id', 'abc')
+    assert not os.path.exists(path)
+    store.save()
+    assert FingerprintStore(path).get('id') == 'abc'
+    assert os.listdir(tmp_path) == ['state.json']
@@ -4,7 +4,8 @@ from datetime import datetime as dt
 import pandas as pd
 import numpy as np
 
-from dw_squared.table import Table, triple_loop_dict, triple_loop_list, within_key
+from dw_squared.table import (Table, format_decimals, rollup, row_spec, triple_loop_dict,
+                               triple_loop_list, within_key)
 
 
 @pytest.fixture
@@ -51,6 +52,134 @@ def test_within_key(table_config):
                     'L3': ['level_l1_l2_l3_0']}
 
 
+def spec_nodes(node, depth=1):
+    for child in node.get(f'L{depth}', []):
+        yield child
+        yield from spec_nodes(child, depth + 1)
+
+
+def test_row_spec_any_depth():
+    config = {'L1': [{'legend': 'a', 'L2': [{'legend': 'b', 'L3': [
+        {'legend': 'c', 'L4': [{'legend': 'd', 'precision': '0.00'}]}]}]},
+        {'legend': 'e'}]}
+    spec = row_spec(config)
+    assert list(spec['legend']) == ['a', 'b', 'c', 'd', 'e']
+    assert list(spec['level']) == [1, 2, 3, 4, 1]
+    assert list(spec['parent']) == [-1, 0, 1, 2, -1]
+    assert triple_loop_list(config, 'precision') == [None, None, None, '0.00', None]
+    assert within_key(config, 'legend') == {'L1': ['a', 'e'], 'L2': ['b'],
+                                            'L3': ['c'], 'L4': ['d']}
+    range_date = pd.date_range(start=dt(2021, 1, 1), end=dt(2021, 12, 31), freq='D')
+    data = pd.DataFrame(np.random.randn(len(range_date), 5), index=range_date,
+                        columns=list('abcde'))
+    for node in spec_nodes(config):
+        node['aggregation_freq'] = 'mean'
+    table = Table(data=data, table_config=config, freq_table='M',
+                  title='deep', token='token', prefix_unit='unit')
+    assert list(table._data['unit']) == [
+        'a', '&nbsp&nbspb', '&nbsp&nbsp&nbsp&nbspc', '&nbsp&nbsp&nbsp&nbsp&nbsp&nbspd', 'e']
+    assert table._data.shape == (5, 25)
+    rows = table.update_row_level_style
+    assert rows['row-3']['style'] == rows['row-2']['style']
+    assert rows['row-3']['format'] == '0.00'
+
+
+def test_rollup():
+    config = {'L1': [
+        {'legend': 'total', 'aggregation_level': 'sum', 'L2': [
+            {'legend': 'x', 'aggregation_level': 'mean', 'L3': [
+                {'legend': 'x1'}, {'legend': 'x2'}]},
+            {'legend': 'y'}]},
+        {'legend': 'fetched', 'L2': [{'legend': 'z'}]}]}
+    spec = row_spec(config)
+    frame = pd.DataFrame([[np.nan, np.nan, 1., 3., 10., 7., 5.],
+                          [np.nan, np.nan, 2., np.nan, np.nan, 7., 5.]],
+                         columns=['total', 'x', 'x1', 'x2', 'y', 'fetched', 'z'])
+    rolled = rollup(frame, spec)
+    assert list(rolled['x']) == [2., 2.]
+    assert list(rolled['total']) == [12., 2.]
+    assert list(rolled['fetched']) == [7., 7.]
+
+
+def test_table_rolls_up_leaf_data():
+    freq = {'aggregation_freq': 'mean'}
+    config = {'L1': [
+        {'legend': 'total', 'aggregation_level': 'sum', 'L2': [
+            {'legend': 'a', **freq}, {'legend': 'b', **freq}]},
+        {'legend': 'c', **freq}]}
+    range_date = pd.date_range(start=dt(2021, 1, 1), end=dt(2021, 12, 31), freq='D')
+    data = pd.DataFrame(np.random.randn(len(range_date), 3), index=range_date,
+                        columns=['a', 'b', 'c']).reindex(columns=['total', 'a', 'b', 'c'])
+    table = Table(data=data, table_config=config, freq_table='M',
+                  title='leaves', token='token')
+    resampled = table._resampled_frame
+    np.testing.assert_allclose(resampled['total'], resampled['a'] + resampled['b'])
+    np.testing.assert_allclose(resampled['a'], data['a'].resample('M').mean())
+
+
+def test_table_styles_are_shared(fake_dw):
+    from dw_squared.index import ChartIndex
+    config = {'L1': [{'legend': 'a', 'aggregation_freq': 'mean',
+                      'L2': [{'legend': 'b', 'aggregation_freq': 'mean'}]}]}
+    range_date = pd.date_range(start=dt(2021, 1, 1), end=dt(2021, 12, 31), freq='D')
+    data = pd.DataFrame(np.random.randn(len(range_date), 2), index=range_date,
+                        columns=['a', 'b'])
+    first, second = [Table(data=data * i, table_config=config, freq_table='M',
+                           title='styles', token='token') for i in (1, 2)]
+    assert first.update_row_level_style is second.update_row_level_style
+    assert first.update_cols_style is second.update_cols_style
+
+    create_chart = fake_dw.create_chart
+
+    def with_defaults(*args, **kwargs):
+        chart = create_chart(*args, **kwargs)
+        chart['metadata'] = {'visualize': {'striped': True}}
+        return chart
+
+    fake_dw.create_chart = with_defaults
+    first.dw, first.index = fake_dw, ChartIndex(fake_dw)
+    first.publish()
+    sent = fake_dw.charts[first.chart['id']]['sent']
+    assert 'striped' not in sent['visualize']
+    assert sent['visualize']['rows'] == first.update_row_level_style
+
+
+def test_upsert_replaces_styles(fake_dw, monkeypatch):
+    from dw_squared.index import ChartIndex
+    index = ChartIndex(fake_dw)
+    leaf = {'aggregation_freq': 'mean'}
+    config = {'L1': [{'legend': 'a', **leaf, 'L2': [{'legend': 'b', **leaf}]},
+                     {'legend': 'c', **leaf}]}
+    range_date = pd.date_range(start=dt(2026, 1, 1), end=dt(2027, 6, 30), freq='D')
+    data = pd.DataFrame(np.random.randn(len(range_date), 3), index=range_date,
+                        columns=['a', 'b', 'c'])
+
+    def table(today, config):
+        monkeypatch.setattr(Table, 'today', dt(*today))
+        plot = Table(data=data, table_config=config, freq_table='M',
+                     title='upserted', token='token')
+        plot.dw, plot.index = fake_dw, index
+        plot.publish(upsert=True)
+        return plot
+
+    table((2026, 10, 18), config)
+    config['L1'].pop()
+    second = table((2027, 1, 18), config)
+    stored = fake_dw.charts[index['upserted']]['metadata']['visualize']
+    assert stored['columns'] == second.update_cols_style
+    assert stored['rows'] == second.update_row_level_style
+    assert 'row-2' not in stored['rows']
+    assert sum('borderLeft' in x for x in stored['columns'].values()) == 2
+
+
+def test_format_decimals():
+    assert format_decimals(None) == 1
+    assert format_decimals('0,0') == 0
+    assert format_decimals('0.00') == 2
+    assert format_decimals('0.0[00]') == 3
+    assert format_decimals('0.0%') == 3
+
+
 def test_freq_agg(token):
     range_date = pd.date_range(
         start=dt(2021, 1, 1), end=dt(2024, 9, 30), freq='M')
@@ -93,3 +222,6 @@ def test_freq_agg(token):
     plot.publish()
     resampled = data.resample(freq_table).mean()
     assert (plot._resample_data(data)[data.columns] == resampled).values.all()
+    rolled = plot._resampled_frame
+    assert np.allclose(rolled['level_l1_l2_0'], resampled['level_l1_l2_l3_0'])
+    assert np.allclose(rolled['level_l1_0'], resampled['level_l1_l2_l3_0'])
@@ -1,5 +1,9 @@
-from dw_squared.transform import name_stats, generate_seasonal_frame, compute_seasonal_stats
+import calendar
+import pytest
+from dw_squared.transform import (name_stats, generate_seasonal_frame, compute_seasonal_stats,
+                                  compute_seasonal_stats_unfolded, grouped_stats)
 from datetime import datetime as dt
+import numpy as np
 import pandas as pd
 
 
@@ -29,4 +33,53 @@ def test_compute_seasonal_stats():
     assert stats.iloc[0, 1] == 2001
     assert stats.iloc[0, 2] == 2007
     assert stats.iloc[0, 3] == sum(range(2001, 2008)) / len(list(range(2001, 2008))) 
-    assert list(stats.columns[-3:]) == [x['name'] for x in meta.values()]
\ No newline at end of file
+    assert list(stats.columns[-3:]) == [x['name'] for x in meta.values()]
+
+def test_generate_seasonal_frame_leap_day():
+    if calendar.isleap(dt.utcnow().year):
+        pytest.skip('Feb 29 exists in the current year')
+    range_date = pd.date_range(start=dt(2019, 1, 1), end=dt(2021, 12, 31), freq='D')
+    data = pd.Series(range(len(range_date)), index=range_date, name='serie').to_frame()
+    dropped = generate_seasonal_frame(data, freq='D', agg='mean')
+    merged = generate_seasonal_frame(data, freq='D', agg='mean', leap_day='merge')
+    feb28 = dt(dt.utcnow().year, 2, 28)
+    assert dropped.loc[feb28, 2020] == data.loc['2020-2-28', 'serie']
+    assert merged.loc[feb28, 2020] == data.loc['2020-2-28':'2020-2-29', 'serie'].mean()
+    assert merged.loc[feb28, 2019] == dropped.loc[feb28, 2019]
+
+def test_grouped_stats_matches_pandas():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=500)
+    values[rng.integers(0, 500, 50)] = np.nan
+    keys = rng.integers(0, 20, 500)
+    stats = ('min', 'max', 'mean', 'std', 'p10', 'p90')
+    groups, result = grouped_stats(values, keys, stats)
+    reference = pd.Series(values).groupby(keys)
+    assert list(groups) == list(reference.min().index)
+    np.testing.assert_allclose(result['min'][:, 0], reference.min())
+    np.testing.assert_allclose(result['max'][:, 0], reference.max())
+    np.testing.assert_allclose(result['mean'][:, 0], reference.mean())
+    np.testing.assert_allclose(result['std'][:, 0], reference.std())
+    np.testing.assert_allclose(result['p10'][:, 0], reference.quantile(.1))
+    np.testing.assert_allclose(result['p90'][:, 0], reference.quantile(.9))
+
+def test_grouped_std_large_offset():
+    rng = np.random.default_rng(1)
+    keys = np.repeat(np.arange(4), 30)
+    for level, scale in ((1e7, 1.), (1e9, 0.01)):
+        values = level + rng.normal(scale=scale, size=len(keys))
+        _, result = grouped_stats(values, keys, ('std',))
+        reference = pd.Series(values - level).groupby(keys).std()
+        np.testing.assert_allclose(result['std'][:, 0], reference, rtol=1e-4)
+
+
+def test_compute_seasonal_stats_unfolded_broadcast():
+    range_date = pd.date_range(start=dt(2001, 1, 1), end=dt(2008, 12, 31), freq='D')
+    data = pd.Series([date.year for date in range_date], index=range_date, name='serie')
+    stats, meta = compute_seasonal_stats_unfolded(
+        data.to_frame(), None, 'M', 'mean', 2005, extra_stats=('p50',))
+    assert list(stats.columns) == ['serie'] + [x['name'] for x in meta.values()]
+    assert (stats[meta['min']['name']] == 2001).all()
+    assert (stats[meta['max']['name']] == 2004).all()
+    assert (stats[meta['p50']['name']] == 2002.5).all()
+    assert len(stats) == 96
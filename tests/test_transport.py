@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+import requests as r
+
+from dw_squared.transport import (CSVPayload, NotFoundError, PooledDatawrapper, TokenBucket,
+                                  Transport)
+
+
+class StandIn(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    failures = dict()
+    requests = []
+
+    def respond(self, status, body=b'', content_type='application/json'):
+        self.send_response(status)
+        self.send_header('content-type', content_type)
+        self.send_header('content-length', str(len(body)))
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_request(self):
+        length = int(self.headers.get('content-length', 0))
+        body = self.rfile.read(length) if length else b''
+        if self.headers.get('transfer-encoding') == 'chunked':
+            size = int(self.rfile.readline(), 16)
+            while size:
+                body += self.rfile.read(size + 2)[:-2]
+                size = int(self.rfile.readline(), 16)
+            self.rfile.readline()
+        self.requests.append((self.command, self.path, body, self.client_address[1]))
+        pending = self.failures.get((self.command, self.path.split('?')[0]), [])
+        if pending:
+            return self.respond(pending.pop(0))
+        if self.command == 'GET':
+            return self.respond(200, json.dumps({'list': [], 'total': 0}).encode())
+        if self.command == 'PUT':
+            return self.respond(204)
+        return self.respond(200, json.dumps({'id': 'abc'}).encode())
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = handle_request
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StandIn)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    StandIn.failures.clear()
+    StandIn.requests.clear()
+    yield f'http://127.0.0.1:{httpd.server_port}'
+    httpd.shutdown()
+
+
+def test_retry_on_rate_limit(server):
+    StandIn.failures[('GET', '/v3/charts')] = [429, 503]
+    transport = Transport(rate=0, backoff=0, base_url=server)
+    dw = PooledDatawrapper('token', transport)
+    assert dw.get_charts() == {'list': [], 'total': 0}
+    assert len(StandIn.requests) == 3
+
+
+def test_retries_exhausted(server):
+    StandIn.failures[('GET', '/v3/charts/abc')] = [500, 500]
+    transport = Transport(rate=0, retries=1, backoff=0, base_url=server)
+    dw = PooledDatawrapper('token', transport)
+    with pytest.raises(Exception):
+        dw.chart_properties('abc')
+    assert len(StandIn.requests) == 2
+
+
+def test_post_is_not_replayed(server):
+    StandIn.failures[('POST', '/v3/charts')] = [502]
+    transport = Transport(rate=0, backoff=0, base_url=server)
+    dw = PooledDatawrapper('token', transport)
+    with pytest.raises(Exception):
+        dw.create_chart('title', 'd3-lines')
+    assert len(StandIn.requests) == 1
+    StandIn.failures[('POST', '/v3/charts')] = [429]
+    assert dw.create_chart('title', 'd3-lines')['id'] == 'abc'
+    assert len(StandIn.requests) == 3
+
+
+def test_post_retries_unsent(monkeypatch):
+    transport = Transport(rate=0, retries=2, backoff=0, base_url='http://127.0.0.1:9')
+    request, calls = transport.session.request, []
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return request(*args, **kwargs)
+
+    monkeypatch.setattr(transport.session, 'request', counted)
+    with pytest.raises(r.ConnectionError):
+        transport.request('POST', 'https://api.datawrapper.de/v3/charts')
+    assert len(calls) == 3
+
+    def read_timeout(*args, **kwargs):
+        calls.append(args)
+        raise r.ReadTimeout()
+
+    calls.clear()
+    monkeypatch.setattr(transport.session, 'request', read_timeout)
+    with pytest.raises(r.ReadTimeout):
+        transport.request('POST', 'https://api.datawrapper.de/v3/charts')
+    assert len(calls) == 1
+
+
+def test_missing_chart(server):
+    StandIn.failures[('GET', '/v3/charts/abc')] = [404]
+    transport = Transport(rate=0, base_url=server)
+    dw = PooledDatawrapper('token', transport)
+    with pytest.raises(NotFoundError):
+        dw.chart_properties('abc')
+    assert len(StandIn.requests) == 1
+
+
+def test_connections_are_reused(server):
+    transport = Transport(rate=0, base_url=server)
+    dw = PooledDatawrapper('token', transport)
+    dw.update_metadata('abc', {'visualize': {}})
+    dw.add_data('abc', 'a,b\n1,2\n')
+    ports = {port for *_, port in StandIn.requests}
+    assert len(ports) == 1
+    assert StandIn.requests[1][2] == b'a,b\n1,2\n'
+
+
+def test_streamed_csv_upload(server):
+    StandIn.failures[('PUT', '/v3/charts/abc/data')] = [503]
+    transport = Transport(rate=0, backoff=0, base_url=server)
+    dw = PooledDatawrapper('token', transport)
+    frame = pd.DataFrame({'index': pd.date_range('2020-1-1', periods=7),
+                          'value': [x / 7 for x in range(7)]})
+    dw.add_data('abc', CSVPayload(frame, decimals=2, chunk_rows=3))
+    expected = frame.round(2).to_csv(index=False).encode()
+    assert [body for *_, body, _ in StandIn.requests] == [expected, expected]
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.09